@@ -0,0 +1,217 @@
+# action_executor.py
+#
+# Where the agent runs custom actions:
+#   http       - POST to the action server in endpoints.yml (`rasa run actions`),
+#                for deployments that run the actions elsewhere, over a pooled
+#                keep-alive session and with trimmed trackers
+#   inprocess  - call the Action classes of the `actions` package directly
+#                in this process, skipping the JSON/HTTP round trip
+
+import asyncio
+import json
+import logging
+import os
+
+import aiohttp
+from rasa.core.utils import read_endpoints_from_path
+from rasa.utils.endpoints import ClientResponseError, EndpointConfig, concat_url
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+ACTION_EXECUTORS = ("http", "inprocess")
+
+
+class InProcessActionEndpoint(EndpointConfig):
+    """Action endpoint that answers RemoteAction calls with rasa_sdk's ActionExecutor.
+
+    RemoteAction posts {"next_action", "tracker", "domain", ...} to
+    `request()`. The same payload is handed to the executor here, and its
+    {"events", "responses"} reply is returned as the action server would.
+    Rejections and unknown actions come back as the HTTP errors the action
+    server would send, so Rasa handles them the same way.
+    """
+
+    def __init__(self, package="actions"):
+        super().__init__(url=f"inprocess://{package}")
+        from rasa_sdk.executor import ActionExecutor
+
+        self.package = package
+        self.executor = ActionExecutor()
+        self.executor.register_package(package)
+        logger.info(f"Registered {len(self.executor.actions)} custom actions from '{package}' in-process")
+
+    async def request(self, method="post", subpath=None, content_type="application/json", compress=False, **kwargs):
+        from rasa_sdk.interfaces import ActionExecutionRejection, ActionNotFoundException
+
+        action_call = kwargs.get("json") or {}
+        try:
+            with metrics.stage("action"):
+                return await self.executor.run(action_call)
+        except ActionExecutionRejection as e:
+            body = {"error": e.message, "action_name": e.action_name}
+            raise ClientResponseError(400, "Bad Request", json.dumps(body))
+        except ActionNotFoundException as e:
+            body = {"error": e.message, "action_name": e.action_name}
+            raise ClientResponseError(404, "Not Found", json.dumps(body))
+
+
+def load_payload_specs(package="actions"):
+    """Return {action name: (slots, events, needs_domain)} declared by the actions.
+
+    Actions declare `tracker_slots`, `tracker_events` and `needs_domain` as
+    class attributes. Actions without them, or a package that cannot be
+    imported here (actions deployed elsewhere only), get the full payload.
+    """
+    try:
+        from rasa_sdk.executor import ActionExecutor
+        executor = ActionExecutor()
+        executor.register_package(package)
+    except Exception as e:
+        logger.info(f"Sending full trackers to the action server, cannot import '{package}': {e}")
+        return {}
+
+    specs = {}
+    for name, run in executor.actions.items():
+        action = getattr(run, "__self__", None)
+        if action is None or not hasattr(action, "tracker_slots"):
+            continue
+        specs[name] = (
+            tuple(action.tracker_slots),
+            getattr(action, "tracker_events", None),
+            getattr(action, "needs_domain", True),
+        )
+    return specs
+
+
+def slim_action_call(action_call, spec):
+    """Copy of a RemoteAction payload with only what `spec` asks for."""
+    slots, events, needs_domain = spec
+    tracker = dict(action_call.get("tracker") or {})
+    tracker["slots"] = {slot: value for slot, value in (tracker.get("slots") or {}).items() if slot in slots}
+    if events is not None:
+        tracker["events"] = (tracker.get("events") or [])[-events:] if events > 0 else []
+    slimmed = dict(action_call, tracker=tracker)
+    if not needs_domain:
+        slimmed.pop("domain", None)
+    return slimmed
+
+
+class PooledActionEndpoint(EndpointConfig):
+    """Action server endpoint that reuses keep-alive connections.
+
+    Stock EndpointConfig opens a new ClientSession, and with it a new TCP
+    connection, for every action call. Here one session per event loop
+    keeps up to `pool_size` connections open for `keepalive_timeout`
+    seconds, and is closed when its loop shuts down. `timeout` and `connect_timeout` bound each call. The options
+    are read from the action_endpoint section of endpoints.yml.
+
+    Payloads of actions listed in `payload_specs` are trimmed with
+    slim_action_call() before they are sent.
+    """
+
+    def __init__(self, url=None, params=None, headers=None, basic_auth=None, token=None,
+                 token_name="token", cafile=None, pool_size=20, timeout=30, connect_timeout=5,
+                 keepalive_timeout=30, slim_payloads=True, payload_specs=None, **kwargs):
+        super().__init__(url, params, headers, basic_auth, token, token_name, cafile, **kwargs)
+        self.pool_size = int(pool_size)
+        self.timeout = float(timeout)
+        self.connect_timeout = float(connect_timeout)
+        self.keepalive_timeout = float(keepalive_timeout)
+        self.payload_specs = payload_specs or {}
+        self.slim_payloads = slim_payloads
+        self._sessions = {}
+        self._pid = None
+
+    @classmethod
+    def from_endpoint(cls, endpoint, payload_specs=None):
+        options = dict(endpoint.kwargs)
+        return cls(endpoint.url, endpoint.params, endpoint.headers, endpoint.basic_auth,
+                   endpoint.token, endpoint.token_name, endpoint.cafile,
+                   payload_specs=payload_specs, **options)
+
+    async def _session(self):
+        # aiohttp sessions belong to the loop they were made on; warm-up runs
+        # on its own loop, and forked workers must not share sockets
+        if self._pid != os.getpid():
+            self._sessions = {}
+            self._pid = os.getpid()
+        loop = asyncio.get_running_loop()
+        for other in [l for l in self._sessions if l.is_closed()]:
+            # A loop closed without shutdown_asyncgens(). Its transports went
+            # with it; closing the session releases the rest and keeps aiohttp
+            # from warning about an unclosed session
+            await self._sessions.pop(other)[0].close()
+        session, _ = self._sessions.get(loop, (None, None))
+        if session is None or session.closed:
+            auth = None
+            if self.basic_auth:
+                auth = aiohttp.BasicAuth(self.basic_auth["username"], self.basic_auth["password"])
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout),
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+                auth=auth,
+            )
+            # asyncio.run() closes pending async generators before it closes
+            # the loop, so the session is closed on its own loop. The loop
+            # only holds a weak reference to the generator; we keep it alive.
+            closer = self._close_on_shutdown(loop, session)
+            loop.create_task(closer.__anext__())
+            self._sessions[loop] = (session, closer)
+        return session
+
+    async def _close_on_shutdown(self, loop, session):
+        try:
+            yield
+        finally:
+            if self._sessions.get(loop, (None,))[0] is session:
+                del self._sessions[loop]
+            await session.close()
+
+    async def request(self, method="post", subpath=None, content_type="application/json", compress=False, **kwargs):
+        headers = {}
+        if content_type:
+            headers["Content-Type"] = content_type
+        headers.update(kwargs.pop("headers", None) or {})
+        if self.headers:
+            headers.update(self.headers)
+        # Our own timeouts replace the one RemoteAction passes
+        kwargs.pop("timeout", None)
+
+        action_call = kwargs.get("json")
+        if self.slim_payloads and isinstance(action_call, dict):
+            spec = self.payload_specs.get(action_call.get("next_action"))
+            if spec is not None:
+                kwargs["json"] = slim_action_call(action_call, spec)
+
+        ssl_context = None
+        if self.cafile:
+            import ssl
+            ssl_context = ssl.create_default_context(cafile=self.cafile)
+
+        url = concat_url(self.url, subpath)
+        with metrics.stage("action"):
+            session = await self._session()
+            async with session.request(
+                method, url, headers=headers, params=self.combine_parameters(kwargs),
+                compress=compress, ssl=ssl_context, **kwargs
+            ) as response:
+                if response.status >= 400:
+                    raise ClientResponseError(response.status, response.reason, await response.content.read())
+                try:
+                    return await response.json()
+                except aiohttp.ContentTypeError:
+                    return None
+
+
+def create_action_endpoint(executor="http", endpoints_path="endpoints.yml"):
+    """The action endpoint to pass to Agent.load for `executor`."""
+    if executor not in ACTION_EXECUTORS:
+        raise ValueError(f"Unknown action executor '{executor}', use one of {', '.join(ACTION_EXECUTORS)}")
+    if executor == "inprocess":
+        return InProcessActionEndpoint()
+    endpoint = read_endpoints_from_path(endpoints_path).action
+    if endpoint is None:
+        return None
+    return PooledActionEndpoint.from_endpoint(endpoint, load_payload_specs())
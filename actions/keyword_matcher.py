@@ -0,0 +1,121 @@
+import re
+from typing import Dict, Iterable, List, Text, Union
+
+_TOKEN = re.compile(r"[a-z0-9]+", re.IGNORECASE)
+_END = None
+
+
+def tokenize(text: Text) -> List[Text]:
+    """Lowercase word tokens with a trailing plural 's' removed.
+
+    Keywords and messages go through the same function, so 'labs' matches
+    the keyword 'lab' and 'hands on' matches 'hands-on'.
+    """
+    return [_normalize(token) for token in _TOKEN.findall(text)]
+
+
+def _normalize(token: Text) -> Text:
+    token = token.lower()
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    return token
+
+
+class KeywordMatches:
+    """Result of one scan: matched keywords per table and label."""
+
+    def __init__(self, found: Dict[Text, Dict[Text, List[Text]]],
+                 longest: Dict[Text, Dict[Text, int]]) -> None:
+        self._found = found
+        self._longest = longest
+
+    def table(self, table: Text) -> Dict[Text, List[Text]]:
+        """Matched labels of `table` in table order, each with its matched keywords."""
+        return self._found.get(table, {})
+
+    def labels(self, table: Text) -> List[Text]:
+        return list(self.table(table))
+
+    def first(self, table: Text):
+        """The most specific label of `table` that matched, or None.
+
+        The label with the longest matched keyword wins, so 'computer
+        engineering' picks its label over 'engineering'; ties go to table
+        order.
+        """
+        longest = self._longest.get(table)
+        return max(longest, key=longest.get) if longest else None
+
+    def any(self, table: Text, label: Text = None) -> bool:
+        found = self.table(table)
+        return bool(found) if label is None else label in found
+
+    def keywords(self, table: Text, label: Text) -> List[Text]:
+        return self.table(table).get(label, [])
+
+
+class KeywordMatcher:
+    """Token trie built once from many keyword tables.
+
+    `tables` maps a table name to either {label: [keywords]} or a plain
+    list of keywords (each keyword is then its own label). A keyword
+    matches only whole tokens, so 'lab' does not fire inside 'collaborate'.
+    A keyword written in capitals, such as 'IT', matches only when the
+    message writes it in capitals too, and not in a message without any
+    lowercase letters, so it does not fire on the English word 'it'.
+
+    `scan()` walks the message once and reports every matching keyword of
+    every table, in table order.
+    """
+
+    def __init__(self, tables: Dict[Text, Union[Dict[Text, Iterable[Text]], Iterable[Text]]]) -> None:
+        self._root = {}
+        self.keyword_count = 0
+        for table, entries in tables.items():
+            if not isinstance(entries, dict):
+                entries = {keyword: [keyword] for keyword in entries}
+            for label_index, (label, keywords) in enumerate(entries.items()):
+                for keyword_index, keyword in enumerate(keywords):
+                    self._add(keyword, table, label, label_index, keyword_index)
+
+    def _add(self, keyword: Text, table: Text, label: Text, label_index: int, keyword_index: int) -> None:
+        tokens = tokenize(keyword)
+        if not tokens:
+            raise ValueError(f"Keyword {keyword!r} has no word characters")
+        # Capitalized keywords must appear in capitals in the message
+        cased = tuple(_TOKEN.findall(keyword)) if keyword.isupper() else None
+        target = (table, label, label_index, keyword_index, keyword, len(tokens), cased)
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, []).append(target)
+        self.keyword_count += 1
+
+    def scan(self, text: Text) -> KeywordMatches:
+        raw = _TOKEN.findall(text)
+        tokens = [_normalize(token) for token in raw]
+        # All-caps messages say nothing about abbreviations
+        shouting = not any(character.islower() for character in text)
+        root = self._root
+        hits = []
+        for start in range(len(tokens)):
+            node = root.get(tokens[start])
+            position = start + 1
+            while node is not None:
+                for target in node.get(_END, ()):
+                    cased = target[6]
+                    if cased is None or (not shouting and tuple(raw[start:position]) == cased):
+                        hits.append(target)
+                if position == len(tokens):
+                    break
+                node = node.get(tokens[position])
+                position += 1
+
+        found = {}
+        longest = {}
+        # Each keyword once per label, in table order
+        for table, label, _, _, keyword, length, _ in sorted(set(hits), key=lambda hit: (hit[0], hit[2], hit[3])):
+            found.setdefault(table, {}).setdefault(label, []).append(keyword)
+            lengths = longest.setdefault(table, {})
+            lengths[label] = max(lengths.get(label, 0), length)
+        return KeywordMatches(found, longest)
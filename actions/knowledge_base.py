@@ -0,0 +1,220 @@
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Text
+
+import yaml
+
+from .keyword_matcher import KeywordMatcher, KeywordMatches
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_BASE_PATH = os.environ.get(
+    "KNOWLEDGE_BASE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.yml")
+)
+
+# How often (seconds) the file's modification time is checked for a reload
+KNOWLEDGE_BASE_CHECK_INTERVAL = float(os.environ.get("KNOWLEDGE_BASE_CHECK_INTERVAL", "2"))
+
+REQUIREMENT_TYPES = ("admission", "curriculum", "graduation")
+CUES = ("facility_access", "facility_usage", "facility_general", "location_general",
+        "office", "dean", "department")
+
+
+class KnowledgeBaseError(ValueError):
+    """knowledge_base.yml is missing or does not have the expected shape."""
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy: dicts become mappingproxies and lists become tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _section(data: Dict, name: Text) -> Dict:
+    section = data.get(name)
+    if not isinstance(section, dict) or not section:
+        raise KnowledgeBaseError(f"'{name}' must be a non-empty mapping")
+    return section
+
+
+def _check(entry: Any, where: Text, fields: Dict[Text, type]) -> None:
+    if not isinstance(entry, dict):
+        raise KnowledgeBaseError(f"{where} must be a mapping")
+    for field, expected in fields.items():
+        if not isinstance(entry.get(field), expected):
+            raise KnowledgeBaseError(f"{where}.{field} must be a {expected.__name__}")
+
+
+def _check_words(words: Any, where: Text) -> None:
+    if not isinstance(words, list) or not words or not all(isinstance(w, str) and w.strip() for w in words):
+        raise KnowledgeBaseError(f"{where} must be a non-empty list of strings")
+
+
+def _check_requirements(requirements: Any, where: Text) -> None:
+    _check(requirements, where, {kind: str for kind in REQUIREMENT_TYPES})
+
+
+def validate(data: Any) -> None:
+    """Raise KnowledgeBaseError describing the first problem in `data`."""
+    if not isinstance(data, dict):
+        raise KnowledgeBaseError("the knowledge base must be a mapping")
+
+    for college, entry in _section(data, "colleges").items():
+        where = f"colleges.{college}"
+        _check(entry, where, {"name": str, "dean_office": str, "department_offices": str,
+                              "follow_ups": dict})
+        _check_words(entry.get("keywords"), f"{where}.keywords")
+        _check_words(entry.get("programs"), f"{where}.programs")
+        _check_requirements(entry.get("requirements"), f"{where}.requirements")
+        for group in ("topics", "programs"):
+            suggestions = entry["follow_ups"].get(group)
+            _check({group: suggestions}, f"{where}.follow_ups", {group: dict})
+            for key, items in suggestions.items():
+                _check_words(items, f"{where}.follow_ups.{group}.{key}")
+
+    for program, entry in _section(data, "programs").items():
+        where = f"programs.{program}"
+        _check(entry, where, {})
+        if "difficulty" in entry:
+            _check(entry, where, {"difficulty": str})
+        if "requirements" in entry:
+            _check_requirements(entry["requirements"], f"{where}.requirements")
+
+    for facility, entry in _section(data, "facilities").items():
+        where = f"facilities.{facility}"
+        _check(entry, where, {"access_info": str, "usage_info": str, "hours": str, "location": str})
+        _check_words(entry.get("keywords"), f"{where}.keywords")
+
+    for location, entry in _section(data, "locations").items():
+        where = f"locations.{location}"
+        _check(entry, where, {"info": str})
+        _check_words(entry.get("keywords"), f"{where}.keywords")
+
+    for service, suggestions in _section(data, "services").items():
+        _check_words(suggestions, f"services.{service}")
+
+    for interest, entry in _section(data, "interests").items():
+        _check_words(entry.get("keywords") if isinstance(entry, dict) else None, f"interests.{interest}.keywords")
+        _check_words(entry.get("recommends"), f"interests.{interest}.recommends")
+
+    requirement_types = _section(data, "requirement_types")
+    for kind, words in requirement_types.items():
+        if kind not in REQUIREMENT_TYPES:
+            raise KnowledgeBaseError(f"requirement_types.{kind} is not one of {', '.join(REQUIREMENT_TYPES)}")
+        _check_words(words, f"requirement_types.{kind}")
+
+    cues = _section(data, "cues")
+    for cue in CUES:
+        _check_words(cues.get(cue), f"cues.{cue}")
+
+
+def keyword_tables(data: Dict) -> Dict[Text, Any]:
+    """The keyword tables of validated knowledge base `data`, by matcher table name."""
+    tables = {
+        "college": {college: entry["keywords"] for college, entry in data["colleges"].items()},
+        "program": {college: entry["programs"] for college, entry in data["colleges"].items()},
+        "facility": {facility: entry["keywords"] for facility, entry in data["facilities"].items()},
+        "location": {location: entry["keywords"] for location, entry in data["locations"].items()},
+        "interest": {interest: entry["keywords"] for interest, entry in data["interests"].items()},
+        "requirement": data["requirement_types"],
+    }
+    tables.update((cue, data["cues"][cue]) for cue in CUES)
+    return tables
+
+
+class KnowledgeBase:
+    """Frozen, indexed contents of knowledge_base.yml.
+
+    `colleges`, `programs`, `facilities`, `locations`, `services` and
+    `interests` are read-only mappings keyed by id. `program_colleges` maps
+    each program name to the college offering it. `scan()` matches a
+    message against every keyword list in one pass (see KeywordMatcher).
+    """
+
+    def __init__(self, data: Dict, path: Optional[Text] = None, mtime: Optional[float] = None) -> None:
+        validate(data)
+        self.path = path
+        self.mtime = mtime
+        self.colleges = freeze(data["colleges"])
+        self.programs = freeze(data["programs"])
+        self.facilities = freeze(data["facilities"])
+        self.locations = freeze(data["locations"])
+        self.services = freeze(data["services"])
+        self.interests = freeze(data["interests"])
+        self.program_colleges = MappingProxyType({
+            program: college
+            for college, entry in reversed(list(self.colleges.items()))
+            for program in entry["programs"]
+        })
+
+        self.matcher = KeywordMatcher(keyword_tables(data))
+
+    @classmethod
+    def load(cls, path: Text = KNOWLEDGE_BASE_PATH) -> "KnowledgeBase":
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f)
+        except (OSError, yaml.YAMLError) as e:
+            raise KnowledgeBaseError(f"Cannot read {path}: {e}") from e
+        try:
+            return cls(data, path, mtime)
+        except KnowledgeBaseError as e:
+            raise KnowledgeBaseError(f"{path}: {e}") from e
+
+    def scan(self, text: Text) -> KeywordMatches:
+        return self.matcher.scan(text)
+
+    def requirements(self, key: Optional[Text]) -> Optional[Mapping[Text, Text]]:
+        """Requirement texts of a program or college id, if the knowledge base has them."""
+        if not key:
+            return None
+        program = self.programs.get(key)
+        if program is not None and "requirements" in program:
+            return program["requirements"]
+        college = self.colleges.get(key)
+        return college["requirements"] if college is not None else None
+
+
+_current = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def knowledge_base(path: Text = KNOWLEDGE_BASE_PATH) -> KnowledgeBase:
+    """The current knowledge base, reloaded first if the file has changed.
+
+    The file is stat'ed at most every KNOWLEDGE_BASE_CHECK_INTERVAL seconds.
+    A changed file that fails to load or validate is logged, and the
+    previous knowledge base stays in use.
+    """
+    global _current, _checked_at
+    now = time.monotonic()
+    if _current is not None and _current.path == path and now - _checked_at < KNOWLEDGE_BASE_CHECK_INTERVAL:
+        return _current
+
+    with _lock:
+        if _current is None or _current.path != path:
+            _current = KnowledgeBase.load(path)
+            logger.info(f"Loaded knowledge base from {path}")
+        else:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = _current.mtime
+            if mtime != _current.mtime:
+                try:
+                    _current = KnowledgeBase.load(path)
+                    logger.info(f"Reloaded knowledge base from {path}")
+                except KnowledgeBaseError as e:
+                    # Don't retry until the file changes again
+                    logger.error(f"Keeping the previous knowledge base: {e}")
+                    _current.mtime = mtime
+        _checked_at = now
+        return _current
@@ -0,0 +1,121 @@
+# admission.py
+#
+# Admission control checked before a message reaches NLU: a token bucket
+# per client IP, one per sender id, and a budget of requests in flight.
+# Sender ids are chosen by the client (the frontend makes a new one on every
+# page load), so the IP bucket is what bounds a single client; the sender
+# bucket keeps one conversation from flooding. Clients behind one proxy or
+# NAT address share an IP bucket, so such deployments raise or disable it.
+# A check is a few dict operations and float arithmetic.
+#
+# State is per process: with several workers every one enforces the limits
+# on the requests it receives.
+
+import contextlib
+import math
+import time
+from collections import Counter, OrderedDict
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted; maps to HTTP 429."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Too many requests ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Buckets:
+    """Token buckets keyed by client, refilled at `rate` per second up to `burst`.
+
+    At most `max_keys` buckets are kept; the least recently used one is
+    dropped (i.e. refilled) when a new key arrives. A rate of 0 disables it.
+    """
+
+    def __init__(self, rate, burst, max_keys, clock):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [tokens, last refill]
+        self._buckets = OrderedDict()
+
+    def take(self, key):
+        """Take one token for `key`; returns 0 on success, else seconds until one is available."""
+        if not self.rate:
+            return 0
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0
+        return (1.0 - bucket[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class Admission:
+    """Decides whether a request may start work.
+
+    Must only be used from one event loop.
+    """
+
+    def __init__(self, ip_rate=10.0, ip_burst=60, sender_rate=1.0, sender_burst=10, max_in_flight=256,
+                 max_clients=100000, clock=time.monotonic):
+        self.ip_buckets = _Buckets(ip_rate, ip_burst, max_clients, clock)
+        self.sender_buckets = _Buckets(sender_rate, sender_burst, max_clients, clock)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = Counter()
+
+    def check(self, ip, sender_id):
+        """Take the tokens for one request, or raise Rejected."""
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            raise self._rejected("in_flight", 1)
+        if ip is not None:
+            wait = self.ip_buckets.take(ip)
+            if wait:
+                raise self._rejected("ip", wait)
+        wait = self.sender_buckets.take(sender_id)
+        if wait:
+            raise self._rejected("sender", wait)
+        self.admitted += 1
+
+    def _rejected(self, reason, wait):
+        self.rejected[reason] += 1
+        return Rejected(reason, max(1, math.ceil(wait)))
+
+    @contextlib.contextmanager
+    def admit(self, ip, sender_id):
+        """check(), then count the request as in flight until the block exits."""
+        self.check(ip, sender_id)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "tracked_ips": len(self.ip_buckets),
+            "tracked_senders": len(self.sender_buckets),
+            "ip_rate": self.ip_buckets.rate,
+            "ip_burst": self.ip_buckets.burst,
+            "sender_rate": self.sender_buckets.rate,
+            "sender_burst": self.sender_buckets.burst,
+        }
@@ -0,0 +1,79 @@
+# asgi.py
+#
+# Native async front end. The Sanic app (Sanic ships with Rasa) is an ASGI
+# application: every request runs as a coroutine on one long-lived event
+# loop shared with the already-loaded Agent, so concurrent conversations
+# are handled concurrently instead of one event loop per request.
+#
+#   python asgi.py                  # built-in server, single process
+#   uvicorn asgi:app --port 5005    # any ASGI server
+
+import json
+
+from sanic import Sanic, response
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from chatbot import (handle_webhook, stream_webhook, stream_bulk, handle_admin_model, get_readiness, get_metrics,
+                     get_stats, TRUSTED_PROXIES)
+
+app = Sanic("alab_chatbot")
+# Behind TRUSTED_PROXIES proxies request.remote_addr is the client from X-Forwarded-For
+app.config.PROXIES_COUNT = TRUSTED_PROXIES
+
+def client_ip(request):
+    return request.remote_addr or request.ip
+
+# With Chat Limit
+@app.route('/webhooks/rest/webhook', methods=['POST', 'OPTIONS'])
+async def webhook(request):
+    if request.method == 'OPTIONS':
+        return response.json({'status': 'OK'})
+
+    body, status, headers = await handle_webhook(request.json, client_ip=client_ip(request))
+    return response.json(body, status=status, headers=headers)
+
+# One JSON message per line (NDJSON), each sent as soon as the bot produces it
+@app.route('/webhooks/rest/webhook/stream', methods=['POST', 'OPTIONS'])
+async def webhook_stream(request):
+    if request.method == 'OPTIONS':
+        return response.json({'status': 'OK'})
+
+    messages = stream_webhook(request.json, client_ip(request))
+    status, headers = await messages.__anext__()
+    stream = await request.respond(status=status, headers=headers, content_type='application/x-ndjson')
+    async for message in messages:
+        await stream.send(json.dumps(message) + '\n')
+    await stream.eof()
+
+# Many (sender, message) pairs at once; one NDJSON result per message as it finishes
+@app.route('/webhooks/rest/bulk', methods=['POST'])
+async def webhook_bulk(request):
+    results = stream_bulk(request.json, request.headers.get('Authorization'), client_ip(request))
+    status, headers = await results.__anext__()
+    stream = await request.respond(status=status, headers=headers, content_type='application/x-ndjson')
+    async for result in results:
+        await stream.send(json.dumps(result) + '\n')
+    await stream.eof()
+
+@app.route('/health/ready', methods=['GET'])
+async def ready(request):
+    body, status = get_readiness()
+    return response.json(body, status=status)
+
+@app.route('/admin/model', methods=['GET', 'POST'])
+async def admin_model(request):
+    data = request.json if request.method == 'POST' else None
+    body, status = handle_admin_model(request.method, data, request.headers.get('Authorization'))
+    return response.json(body, status=status)
+
+@app.route('/stats', methods=['GET'])
+async def stats(request):
+    return response.json(get_stats())
+
+@app.route('/metrics', methods=['GET'])
+async def prometheus_metrics(request):
+    return response.text(get_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+if __name__ == '__main__':
+    print("\nRasa webhook server (ASGI) is running on http://localhost:5005")
+    app.run(host='0.0.0.0', port=5005, workers=1, access_log=False)
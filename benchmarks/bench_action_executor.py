@@ -0,0 +1,103 @@
+# bench_action_executor.py
+#
+# Latency of turns that run action_set_active_college, with custom actions
+# executed over HTTP by the action server and in-process. Loads the latest
+# model from models/ once per mode and sends *_general_inquiry utterances
+# from data/nlu.yml, each from a fresh sender. The HTTP mode starts
+# `rasa run actions` itself unless --no-action-server is given.
+#
+#   python benchmarks/bench_action_executor.py [--turns 200]
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from nlu_data import load_nlu_examples
+from startup import import_rasa, load_agent
+
+ACTION_SERVER_HEALTH = "http://localhost:5055/health"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def start_action_server():
+    process = subprocess.Popen([sys.executable, "-m", "rasa", "run", "actions", "--port", "5055"],
+                               cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("rasa run actions exited early")
+        try:
+            urllib.request.urlopen(ACTION_SERVER_HEALTH, timeout=1).read()
+            return process
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Action server did not come up within 60s")
+
+
+async def run_turns(agent, utterances, turns, label):
+    latencies = []
+    ran_action = 0
+    for n in range(turns):
+        sender = f"bench_actions_{label}_{n}"
+        start = time.perf_counter()
+        await agent.handle_text(utterances[n % len(utterances)], sender_id=sender)
+        latencies.append(time.perf_counter() - start)
+
+        tracker = await agent.tracker_store.retrieve(sender)
+        if any(getattr(e, "action_name", None) == "action_set_active_college" for e in tracker.events):
+            ran_action += 1
+    return latencies, ran_action
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--no-action-server", action="store_true",
+                        help="use an action server that is already running on :5055")
+    args = parser.parse_args()
+
+    utterances = [text for intent, text in load_nlu_examples()
+                  if intent.endswith("_general_inquiry")]
+    Agent = import_rasa()
+    from action_executor import create_action_endpoint
+    from model_manager import ModelManager
+    model = ModelManager().latest_model()
+
+    action_server = None if args.no_action_server else start_action_server()
+    try:
+        print(f"{args.turns} turns from {len(utterances)} *_general_inquiry utterances")
+        print(f"{'mode':<10} {'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ran action':>11}")
+        for mode in ("http", "inprocess"):
+            agent = load_agent(Agent, model, {}, action_endpoint=create_action_endpoint(mode))
+            # Untimed turns so TensorFlow tracing is not measured
+            asyncio.run(run_turns(agent, utterances, 10, f"warmup_{mode}"))
+
+            start = time.perf_counter()
+            latencies, ran_action = asyncio.run(run_turns(agent, utterances, args.turns, mode))
+            elapsed = time.perf_counter() - start
+            print(f"{mode:<10} {args.turns / elapsed:>8.1f} "
+                  f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} "
+                  f"{percentile(latencies, 99) * 1000:>8.1f} {ran_action:>11}")
+    finally:
+        if action_server is not None:
+            action_server.terminate()
+            action_server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# bench_action_payload.py
+#
+# Payload size and latency of calls to an out-of-process action server,
+# before (stock EndpointConfig: new connection per call, full tracker and
+# domain) and after (PooledActionEndpoint: keep-alive pool, payload trimmed
+# to what each action declares). The tracker is built by running --history
+# turns of utterances from data/nlu.yml, so later turns carry a realistic
+# event history. Starts `rasa run actions` unless --no-action-server is given.
+#
+#   python benchmarks/bench_action_payload.py [--history 20] [--calls 200]
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from bench_action_executor import percentile, start_action_server
+from nlu_data import sample_utterances
+from startup import import_rasa, load_agent
+
+SENDER = "bench_action_payload"
+
+
+async def build_tracker(agent, turns):
+    for text in sample_utterances(turns, seed=1):
+        await agent.handle_text(text, sender_id=SENDER)
+    return await agent.tracker_store.retrieve(SENDER)
+
+
+async def time_calls(endpoint, payload, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await endpoint.request(json=payload, method="post", timeout=30)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=20, help="turns in the tracker before measuring")
+    parser.add_argument("--calls", type=int, default=200, help="calls per action and mode")
+    parser.add_argument("--no-action-server", action="store_true",
+                        help="use an action server that is already running on :5055")
+    args = parser.parse_args()
+
+    Agent = import_rasa()
+    from rasa.core.actions.action import RemoteAction
+    from rasa.core.utils import read_endpoints_from_path
+    from rasa.utils.endpoints import EndpointConfig
+    from action_executor import PooledActionEndpoint, load_payload_specs, slim_action_call
+    from model_manager import ModelManager
+
+    specs = load_payload_specs()
+    configured = read_endpoints_from_path("endpoints.yml").action
+    stock = EndpointConfig(configured.url)
+    pooled = PooledActionEndpoint.from_endpoint(configured, specs)
+
+    # In-process actions, so the history can be built without the server
+    from action_executor import InProcessActionEndpoint
+    agent = load_agent(Agent, ModelManager().latest_model(), {}, action_endpoint=InProcessActionEndpoint())
+    tracker = asyncio.run(build_tracker(agent, args.history))
+    print(f"Tracker after {args.history} turns: {len(tracker.events)} events, {len(tracker.slots)} slots")
+
+    action_server = None if args.no_action_server else start_action_server()
+    try:
+        print(f"{'action':<38} {'bytes before':>12} {'after':>8} {'p50 before':>11} {'after':>7} "
+              f"{'p95 before':>11} {'after':>7}")
+
+        async def measure():
+            for name, spec in specs.items():
+                payload = RemoteAction(name, stock)._action_call_format(tracker, agent.domain)
+                full_bytes = len(json.dumps(payload))
+                slim_bytes = len(json.dumps(slim_action_call(payload, spec)))
+                before = await time_calls(stock, payload, args.calls)
+                after = await time_calls(pooled, payload, args.calls)
+                print(f"{name:<38} {full_bytes:>12} {slim_bytes:>8} "
+                      f"{percentile(before, 50) * 1000:>9.2f}ms {percentile(after, 50) * 1000:>5.2f}ms "
+                      f"{percentile(before, 95) * 1000:>9.2f}ms {percentile(after, 95) * 1000:>5.2f}ms")
+
+        asyncio.run(measure())
+    finally:
+        if action_server is not None:
+            action_server.terminate()
+            action_server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# bench_history_writer.py
+#
+# Per-request latency of chat history persistence with 10/100/1000 concurrent
+# senders, comparing the old full-file rewrite with the append-only
+# HistoryWriter. Model inference is simulated with a short asyncio.sleep so
+# that only the persistence cost differs between the two modes.
+#
+#   python benchmarks/bench_history_writer.py [--turns 10] [--inference-ms 5]
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_writer import HistoryWriter
+
+BOT_REPLY = "Hello! I am A.L.A.B, your Academic Learning Assistance Bot. How can I help you today? " * 3
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+async def rewrite_sender(directory, sender, turns, inference_s, latencies):
+    """Old behaviour: keep the transcript in memory and rewrite the file every turn."""
+    path = os.path.join(directory, f"{sender}.txt")
+    history = [f"Chat History for User ID: {sender}", "Started: now", "=" * 50]
+    for turn in range(turns):
+        start = time.perf_counter()
+        history.append(f"[now] User: message {turn}")
+        await asyncio.sleep(inference_s)
+        history.append(f"[now] Bot: {BOT_REPLY}")
+        with open(path, "w", encoding="utf-8") as f:
+            for line in history:
+                f.write(line + "\n")
+        latencies.append(time.perf_counter() - start)
+
+
+async def append_sender(directory, sender, turns, inference_s, latencies, writer):
+    """New behaviour: hand only this turn's lines to the background writer."""
+    path = os.path.join(directory, f"{sender}.txt")
+    for turn in range(turns):
+        start = time.perf_counter()
+        lines = []
+        if turn == 0:
+            lines.extend([f"Chat History for User ID: {sender}", "Started: now", "=" * 50])
+        lines.append(f"[now] User: message {turn}")
+        await asyncio.sleep(inference_s)
+        lines.append(f"[now] Bot: {BOT_REPLY}")
+        writer.append(path, lines)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(mode, senders, turns, inference_s):
+    latencies = []
+    with tempfile.TemporaryDirectory() as directory:
+        writer = HistoryWriter(flush_interval=0.05)
+        start = time.perf_counter()
+        if mode == "rewrite":
+            tasks = [rewrite_sender(directory, f"user_{i}", turns, inference_s, latencies) for i in range(senders)]
+        else:
+            tasks = [append_sender(directory, f"user_{i}", turns, inference_s, latencies, writer) for i in range(senders)]
+        await asyncio.gather(*tasks)
+        writer.flush()
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--inference-ms", type=float, default=5.0)
+    parser.add_argument("--senders", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'senders':>8} {'mode':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'total s':>8}")
+    for senders in args.senders:
+        for mode in ("rewrite", "append"):
+            latencies, elapsed = asyncio.run(run(mode, senders, args.turns, args.inference_ms / 1000.0))
+            print(f"{senders:>8} {mode:>8} "
+                  f"{percentile(latencies, 50) * 1000:>9.2f} "
+                  f"{percentile(latencies, 99) * 1000:>9.2f} "
+                  f"{max(latencies) * 1000:>9.2f} "
+                  f"{elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# bench_inference_pool.py
+#
+# Turn throughput and latency with NLU and policy inference on the event
+# loop versus an InferencePool of 1, 2, 4 and 8 thread or process workers.
+# C concurrent senders run full turns (utterances sampled from data/nlu.yml,
+# custom actions in-process) for a fixed duration. Meanwhile a probe wakes
+# up every 10 ms on the same loop; how late it wakes up is the delay any
+# other request, such as an OPTIONS preflight, would see. Each setting runs
+# in a fresh process so worker processes are forked before TensorFlow loads.
+#
+#   python benchmarks/bench_inference_pool.py [--concurrency 16] [--workers 1,2,4,8] [--modes thread,process]
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from bench_nlu_batching import percentile
+from inference_pool import InferencePool
+from nlu_data import sample_utterances
+
+PROBE_INTERVAL = 0.01
+
+
+async def sender(agent, pool, utterances, sender_id, deadline, latencies):
+    from rasa.core.channels.channel import UserMessage
+
+    n = sender_id
+    while time.perf_counter() < deadline:
+        text = utterances[n % len(utterances)]
+        n += 1
+        start = time.perf_counter()
+        parse_data = await pool.parse(agent, text)
+        await agent.handle_message(UserMessage(text, sender_id=f"bench_{sender_id}", parse_data=parse_data))
+        latencies.append(time.perf_counter() - start)
+
+
+async def probe(deadline, lags):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def run(agent, pool, utterances, concurrency, duration):
+    latencies, lags = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(probe(deadline, lags),
+                         *(sender(agent, pool, utterances, i, deadline, latencies) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies, lags
+
+
+def run_setting(mode, workers, concurrency, duration):
+    # Fork before TensorFlow is imported, as chatbot.py does
+    pool = InferencePool(mode=mode, workers=workers)
+    pool.start()
+
+    from startup import import_rasa, load_agent
+    from action_executor import InProcessActionEndpoint
+    from model_manager import ModelManager
+    Agent = import_rasa()
+    model_path = ModelManager().latest_model()
+    agent = load_agent(Agent, model_path, {}, action_endpoint=InProcessActionEndpoint())
+    pool.install(agent, model_path)
+
+    utterances = sample_utterances(500)
+    # Untimed round so every worker has traced its graphs
+    asyncio.run(run(agent, pool, utterances, concurrency, 3))
+    throughput, latencies, lags = asyncio.run(run(agent, pool, utterances, concurrency, duration))
+    return {
+        "mode": mode,
+        "workers": workers if pool.enabled else 0,
+        "turns_per_s": throughput,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "lag_p99_ms": percentile(lags, 99) * 1000,
+        "lag_max_ms": max(lags) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--modes", default="thread,process", help="comma-separated modes besides 'loop'")
+    parser.add_argument("--setting", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.setting:
+        mode, workers = args.setting.split(":")
+        print(json.dumps(run_setting(mode, int(workers), args.concurrency, args.duration)))
+        return
+
+    settings = [("loop", 1)] + [(mode, int(workers)) for mode in args.modes.split(",")
+                                for workers in args.workers.split(",")]
+    print(f"{args.concurrency} concurrent senders, {args.duration:.0f}s per setting, {os.cpu_count()} CPUs")
+    print(f"{'mode':<8} {'workers':>7} {'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'lag p99':>8} {'lag max':>8}")
+    for mode, workers in settings:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--setting", f"{mode}:{workers}",
+             "--concurrency", str(args.concurrency), "--duration", str(args.duration)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{r['mode']:<8} {r['workers']:>7} {r['turns_per_s']:>8.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['lag_p99_ms']:>6.1f}ms {r['lag_max_ms']:>6.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# bench_keyword_matcher.py
+#
+# Per-action keyword matching latency: the old `any(keyword in message ...)`
+# substring scans against one shared KeywordMatcher scan, with the keyword
+# tables at their real size and grown 10x (and 100x) with synthetic
+# keywords. Tables come from actions/knowledge_base.yml, messages are
+# sampled from data/nlu.yml.
+#
+#   python benchmarks/bench_keyword_matcher.py [--messages 500] [--scales 1,10,100]
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import yaml
+
+from actions.keyword_matcher import KeywordMatcher
+from actions.knowledge_base import KNOWLEDGE_BASE_PATH, keyword_tables, validate
+from nlu_data import sample_utterances
+
+
+def load_tables():
+    with open(KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    validate(data)
+    # Plain keyword lists become one label per keyword, as in KeywordMatcher
+    return {
+        table: entries if isinstance(entries, dict) else {keyword: [keyword] for keyword in entries}
+        for table, entries in keyword_tables(data).items()
+    }
+
+
+# Tables each action looks at, and whether it stops at the first matching label
+ACTIONS = {
+    'ActionSetActiveCollege': [('college', True)],
+    'ActionHandleProgramComparison': [('program', False)],
+    'ActionHandleProgramDifficulty': [('program', True)],
+    'ActionHandleFacilityAccess': [('facility', True), ('facility_access', True),
+                                   ('facility_usage', True), ('facility_general', True)],
+    'ActionTrackLocationContext': [('location', True), ('dean', True), ('department', True),
+                                   ('office', True), ('location_general', True)],
+    'ActionValidateProgramRequirements': [('requirement', True)],
+    'ActionManageStudentPreferences': [('interest', False)],
+}
+
+
+def grow(tables, scale, seed=0):
+    """Add (scale - 1) synthetic keywords per real one, one or two words each."""
+    rng = random.Random(seed)
+
+    def word():
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+    grown = {}
+    for table, labels in tables.items():
+        grown[table] = {}
+        for label, keywords in labels.items():
+            extra = [" ".join(word() for _ in range(rng.randint(1, 2)))
+                     for _ in range(len(keywords) * (scale - 1))]
+            grown[table][label] = list(keywords) + extra
+    return grown
+
+
+def substring_scan(tables, action, message):
+    message = message.lower()
+    found = []
+    for table, first_only in ACTIONS[action]:
+        for label, keywords in tables[table].items():
+            if any(keyword in message for keyword in keywords):
+                found.append(label)
+                if first_only:
+                    break
+    return found
+
+
+def matcher_scan(matcher, action, message):
+    matches = matcher.scan(message)
+    found = []
+    for table, first_only in ACTIONS[action]:
+        labels = matches.labels(table)
+        found.extend(labels[:1] if first_only else labels)
+    return found
+
+
+def time_per_message(fn, messages, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--scales", default="1,10,100")
+    args = parser.parse_args()
+
+    messages = sample_utterances(args.messages, os.path.join(ROOT, "data", "nlu.yml"))
+    print(f"{len(messages)} messages from data/nlu.yml, microseconds per message")
+    for scale in (int(s) for s in args.scales.split(",")):
+        tables = grow(load_tables(), scale)
+        start = time.perf_counter()
+        matcher = KeywordMatcher(tables)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"\ntables x{scale}: {matcher.keyword_count} keywords, matcher built in {build_ms:.1f} ms")
+        print(f"{'action':<36} {'substring':>10} {'matcher':>10} {'speed-up':>9}")
+        for action in ACTIONS:
+            old = time_per_message(lambda m: substring_scan(tables, action, m), messages)
+            new = time_per_message(lambda m: matcher_scan(matcher, action, m), messages)
+            print(f"{action:<36} {old:>10.1f} {new:>10.1f} {old / new:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
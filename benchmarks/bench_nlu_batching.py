@@ -0,0 +1,85 @@
+# bench_nlu_batching.py
+#
+# NLU throughput versus micro-batch window. Loads the latest model from
+# models/ in-process and lets C concurrent clients parse utterances sampled
+# from data/nlu.yml through an NLUBatcher for a fixed duration, once per
+# window. A window of 0 is the unbatched baseline (agent.parse_message).
+#
+#   python benchmarks/bench_nlu_batching.py [--concurrency 32] [--windows 0,5,10,20]
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from nlu_batcher import NLUBatcher
+from nlu_data import sample_utterances
+from startup import import_rasa, load_agent
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+async def client(agent, batcher, utterances, offset, deadline, latencies):
+    n = offset
+    while time.perf_counter() < deadline:
+        text = utterances[n % len(utterances)]
+        n += 1
+        start = time.perf_counter()
+        if batcher.enabled:
+            await batcher.parse(agent, text)
+        else:
+            await agent.parse_message(text)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(agent, window_ms, concurrency, duration, max_batch, utterances):
+    batcher = NLUBatcher(window=window_ms / 1000.0, max_batch=max_batch)
+    # Untimed round so both code paths are traced before measuring
+    deadline = time.perf_counter() + 2
+    await asyncio.gather(*(client(agent, batcher, utterances, i, deadline, [])
+                           for i in range(concurrency)))
+
+    batcher = NLUBatcher(window=window_ms / 1000.0, max_batch=max_batch)
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(agent, batcher, utterances, i * 7, deadline, latencies)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies, batcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--windows", default="0,2,5,10,20", help="comma-separated windows in ms")
+    parser.add_argument("--max-batch", type=int, default=32)
+    args = parser.parse_args()
+
+    Agent = import_rasa()
+    from model_manager import ModelManager
+    agent = load_agent(Agent, ModelManager().latest_model(), {})
+    utterances = sample_utterances(500)
+
+    print(f"{args.concurrency} concurrent clients, {args.duration:.0f}s per window")
+    print(f"{'window':>8} {'msg/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for window_ms in (float(w) for w in args.windows.split(",")):
+        throughput, latencies, stats = asyncio.run(
+            run(agent, window_ms, args.concurrency, args.duration, args.max_batch, utterances))
+        print(f"{window_ms:>6.0f}ms {throughput:>8.1f} "
+              f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} "
+              f"{percentile(latencies, 99) * 1000:>8.1f} {stats['mean_batch'] or 1.0:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
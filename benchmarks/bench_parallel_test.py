@@ -0,0 +1,53 @@
+# bench_parallel_test.py
+#
+# Wall-clock scaling of parallel_test.py from 1 to N worker processes: the
+# full evaluation of the test stories and data/nlu.yml (model loading
+# included) for each worker count, with the speed-up over one worker and the
+# parallel efficiency. Also checks that every worker count reports the same
+# accuracies, i.e. that sharding does not change the results.
+#
+#   python benchmarks/bench_parallel_test.py [--workers 1,2,4,8] [--model models/<archive>.tar.gz]
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import parallel_test
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = ",".join(str(n) for n in sorted({1, 2, 4, 8, cpus}) if n <= cpus)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=default_workers, help="comma-separated worker counts")
+    parser.add_argument("--model", help="model archive, default: the newest in models/")
+    parser.add_argument("--stories", default=parallel_test.STORIES_PATH)
+    parser.add_argument("--nlu", default=parallel_test.NLU_PATH)
+    args = parser.parse_args()
+
+    from model_manager import ModelManager
+    model_path = args.model or ModelManager().latest_model()
+
+    print(f"{cpus} CPUs, model {os.path.basename(model_path)}")
+    print(f"{'workers':>7} {'wall s':>8} {'speed-up':>9} {'efficiency':>11} {'stories':>8} {'nlu':>7}")
+    baseline = None
+    accuracies = set()
+    for workers in (int(n) for n in args.workers.split(",")):
+        report, timings = parallel_test.run(model_path, workers, args.stories, args.nlu)
+        wall = timings["wall"]
+        # Speed-up over the first (normally single-worker) run
+        baseline = baseline or (workers, wall)
+        speedup = baseline[1] / wall
+        accuracies.add((report["stories"]["accuracy"], report["nlu"]["accuracy"]))
+        print(f"{workers:>7} {wall:>8.1f} {speedup:>8.2f}x {speedup * baseline[0] / workers:>10.0%} "
+              f"{report['stories']['accuracy'] or 0:>8.3f} {report['nlu']['accuracy'] or 0:>7.3f}")
+    if len(accuracies) > 1:
+        sys.exit("Accuracies differ between worker counts")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# bench_session_backend.py
+#
+# Runs N worker processes against one session store and checks that the
+# message limit is enforced exactly: every sender must get exactly
+# MESSAGE_LIMIT messages accepted, no matter how the workers interleave.
+# Also reports touch() throughput per backend.
+#
+#   python benchmarks/bench_session_backend.py [--workers 8] [--senders 50]
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_allocator import ChatFileAllocator
+from sessions import create_session_store
+
+MESSAGE_LIMIT = 10
+
+
+def worker(db_path, chat_dir, senders, messages_per_sender, results):
+    store = create_session_store("sqlite", ChatFileAllocator(chat_dir), db_path=db_path)
+    accepted = {}
+    filenames = {}
+    for _ in range(messages_per_sender):
+        for sender_id in senders:
+            session, _ = store.touch(sender_id)
+            filenames.setdefault(sender_id, set()).add(session.filename)
+            if session.message_count <= MESSAGE_LIMIT:
+                accepted[sender_id] = accepted.get(sender_id, 0) + 1
+    results.put((accepted, filenames))
+
+
+def check_sqlite(workers, senders, messages_per_sender):
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "sessions.db")
+        chat_dir = os.path.join(directory, "chat_histories")
+        os.makedirs(chat_dir)
+        sender_ids = [f"user_{i}" for i in range(senders)]
+        create_session_store("sqlite", ChatFileAllocator(chat_dir), db_path=db_path)
+
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=worker, args=(db_path, chat_dir, sender_ids, messages_per_sender, results))
+            for _ in range(workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+    accepted = {}
+    filenames = {}
+    for worker_accepted, worker_filenames in outcomes:
+        for sender_id, count in worker_accepted.items():
+            accepted[sender_id] = accepted.get(sender_id, 0) + count
+        for sender_id, names in worker_filenames.items():
+            filenames.setdefault(sender_id, set()).update(names)
+
+    wrong = {s: accepted.get(s, 0) for s in sender_ids if accepted.get(s, 0) != MESSAGE_LIMIT}
+    split = {s: names for s, names in filenames.items() if len(names) != 1}
+    total = workers * senders * messages_per_sender
+    print(f"sqlite: {workers} workers, {total} messages in {elapsed:.2f}s ({total / elapsed:.0f} msg/s)")
+    if wrong or split:
+        print(f"  FAILED: wrong accepted counts {wrong}, split transcripts {split}")
+        return False
+    print(f"  OK: each of {senders} senders got exactly {MESSAGE_LIMIT} messages accepted and one chat file")
+    return True
+
+
+def bench_memory(senders, messages):
+    with tempfile.TemporaryDirectory() as directory:
+        store = create_session_store("memory", ChatFileAllocator(directory))
+        start = time.perf_counter()
+        for _ in range(messages):
+            for i in range(senders):
+                store.touch(f"user_{i}")
+        elapsed = time.perf_counter() - start
+    total = senders * messages
+    print(f"memory: 1 process, {total} messages in {elapsed:.2f}s ({total / elapsed:.0f} msg/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--senders", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=5, help="messages per sender per worker")
+    args = parser.parse_args()
+
+    if args.workers * args.messages <= MESSAGE_LIMIT:
+        parser.error("workers * messages must exceed the message limit to exercise it")
+
+    bench_memory(args.senders, args.workers * args.messages)
+    ok = check_sqlite(args.workers, args.senders, args.messages)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# bench_startup.py
+#
+# Cold-start time and first-request latency of the webhook server, with and
+# without model warm-up. Each run starts a fresh server process, polls
+# /health/ready until it reports ready, then times the first real message.
+#
+#   python benchmarks/bench_startup.py [--server asgi.py] [--runs 3]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_URL = "http://localhost:5005"
+
+FIRST_MESSAGES = ["what programs does ccs offer?", "hello"]
+
+
+def get_json(path, timeout=2.0):
+    with urllib.request.urlopen(BASE_URL + path, timeout=timeout) as resp:
+        return resp.status, json.loads(resp.read())
+
+
+def post_message(sender, message):
+    body = json.dumps({"sender": sender, "message": message}).encode("utf-8")
+    req = urllib.request.Request(BASE_URL + "/webhooks/rest/webhook", data=body,
+                                 headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+
+def run_once(server, env_overrides):
+    env = dict(os.environ, **env_overrides)
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, server], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        listening = None
+        report = None
+        while report is None:
+            if process.poll() is not None:
+                raise RuntimeError(f"{server} exited with code {process.returncode}")
+            try:
+                status, body = get_json("/health/ready")
+                if listening is None:
+                    listening = time.perf_counter() - start
+                if status == 200:
+                    report = body
+            except urllib.error.HTTPError as e:
+                if listening is None:
+                    listening = time.perf_counter() - start
+                if e.code != 503:
+                    raise
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.1)
+        ready = time.perf_counter() - start
+
+        sender = f"bench_startup_{int(time.time() * 1000)}"
+        first = [post_message(sender, message) for message in FIRST_MESSAGES]
+        return listening, ready, first, report["timings"]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", default="asgi.py", help="asgi.py or app.py")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = [
+        ("no warm-up", {"WARMUP_SAMPLES": "0", "WARMUP_TURNS": "0"}),
+        ("warm-up", {}),
+    ]
+    for label, env_overrides in modes:
+        for run in range(args.runs):
+            listening, ready, first, timings = run_once(args.server, env_overrides)
+            phases = ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in timings.items())
+            print(f"{label:<11} run {run + 1}: listening {listening:.2f}s, ready {ready:.2f}s, "
+                  f"1st request {first[0] * 1000:.0f} ms, 2nd {first[1] * 1000:.0f} ms")
+            print(f"{'':<11}   {phases}")
+
+
+if __name__ == '__main__':
+    main()
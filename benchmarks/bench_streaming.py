@@ -0,0 +1,87 @@
+# bench_streaming.py
+#
+# Time to first message of the buffered webhook versus the streaming one
+# (/webhooks/rest/webhook/stream, NDJSON). Each utterance is sent to both
+# endpoints from two fresh senders, so both run the same dialogue. For the
+# buffered endpoint the first message arrives with the last; the stream
+# delivers it once the first action of the turn has run. Utterances of the
+# *_general_inquiry intents are used because their turns chain an action
+# server call and a follow-up question.
+#
+#   python asgi.py   # serves on :5005
+#   python benchmarks/bench_streaming.py [--url http://localhost:5005] [--turns 100]
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from load_test import RUN_ID, percentile
+from nlu_data import load_nlu_examples
+
+
+async def buffered_turn(session, base_url, sender, text):
+    start = time.perf_counter()
+    async with session.post(f"{base_url}/webhooks/rest/webhook", json={"sender": sender, "message": text}) as resp:
+        messages = await resp.json()
+        resp.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, len(messages)
+
+
+async def streamed_turn(session, base_url, sender, text):
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async with session.post(f"{base_url}/webhooks/rest/webhook/stream",
+                            json={"sender": sender, "message": text}) as resp:
+        resp.raise_for_status()
+        async for line in resp.content:
+            if not line.strip():
+                continue
+            json.loads(line)
+            count += 1
+            if first is None:
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:5005")
+    parser.add_argument("--turns", type=int, default=100)
+    args = parser.parse_args()
+
+    texts = [text for intent, text in load_nlu_examples() if intent.endswith("_general_inquiry")]
+    texts = random.Random(0).sample(texts, min(args.turns, len(texts)))
+
+    async def run():
+        results = {"buffered": [], "stream": []}
+        async with aiohttp.ClientSession() as session:
+            for i, text in enumerate(texts):
+                results["buffered"].append(await buffered_turn(session, args.url, f"bench_buffered_{RUN_ID}_{i}", text))
+                results["stream"].append(await streamed_turn(session, args.url, f"bench_stream_{RUN_ID}_{i}", text))
+        return results
+
+    results = asyncio.run(run())
+    print(f"{len(texts)} turns against {args.url}")
+    print(f"{'endpoint':<9} {'first p50':>10} {'first p95':>10} {'last p50':>9} {'last p95':>9} {'msgs/turn':>10}")
+    for name, rows in results.items():
+        first = [row[0] for row in rows if row[0] is not None]
+        last = [row[1] for row in rows]
+        print(f"{name:<9} {percentile(first, 50) * 1000:>8.0f}ms {percentile(first, 95) * 1000:>8.0f}ms "
+              f"{percentile(last, 50) * 1000:>7.0f}ms {percentile(last, 95) * 1000:>7.0f}ms "
+              f"{sum(row[2] for row in rows) / len(rows):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# bench_thread_budget.py
+#
+# Throughput and tail latency for a matrix of worker processes x threads per
+# worker. For each cell W processes are started with thread_budget applied
+# (threads 0 keeps the TensorFlow/BLAS defaults, i.e. one pool per core in
+# every process). Each loads the latest model with in-process actions and
+# runs full turns from --senders concurrent senders. All workers start
+# measuring together once every one has loaded, and turns are counted
+# across all of them.
+#
+#   python benchmarks/bench_thread_budget.py [--workers 1,2,4,8] [--threads 0,1,2,4] [--duration 20]
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from bench_nlu_batching import percentile
+
+
+async def sender(agent, utterances, sender_id, deadline, latencies):
+    n = sender_id
+    while time.perf_counter() < deadline:
+        text = utterances[n % len(utterances)]
+        n += 1
+        start = time.perf_counter()
+        await agent.handle_text(text, sender_id=f"bench_{os.getpid()}_{sender_id}")
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(agent, utterances, senders, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(sender(agent, utterances, i, deadline, latencies) for i in range(senders)))
+    return latencies
+
+
+def run_worker(workers, threads, senders, duration):
+    """One worker process: load, report ready, wait for 'go', measure."""
+    import thread_budget
+    thread_budget.apply(workers=workers, threads=threads)
+
+    from startup import import_rasa, load_agent
+    from action_executor import InProcessActionEndpoint
+    from model_manager import ModelManager
+    from nlu_data import sample_utterances
+    Agent = import_rasa()
+    agent = load_agent(Agent, ModelManager().latest_model(), {}, action_endpoint=InProcessActionEndpoint())
+    utterances = sample_utterances(500)
+    asyncio.run(run(agent, utterances, senders, 3))
+
+    print("ready", flush=True)
+    sys.stdin.readline()
+    latencies = asyncio.run(run(agent, utterances, senders, duration))
+    print(json.dumps(latencies), flush=True)
+
+
+def run_cell(workers, threads, senders, duration):
+    processes = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", f"{workers}:{threads}",
+             "--senders", str(senders), "--duration", str(duration)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        for line in process.stdout:
+            if line.strip() == "ready":
+                break
+    for process in processes:
+        process.stdin.write("go\n")
+        process.stdin.flush()
+
+    latencies = []
+    for process in processes:
+        latencies.extend(json.loads(process.stdout.readlines()[-1]))
+        process.wait()
+    return len(latencies) / duration, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker process counts")
+    parser.add_argument("--threads", default="0,1,2,4", help="comma-separated threads per worker, 0 = defaults")
+    parser.add_argument("--senders", type=int, default=4, help="concurrent senders per worker")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        workers, threads = (int(value) for value in args.worker.split(":"))
+        run_worker(workers, threads, args.senders, args.duration)
+        return
+
+    print(f"{os.cpu_count()} CPUs, {args.senders} senders per worker, {args.duration:.0f}s per cell")
+    print(f"{'workers':>7} {'threads':>8} {'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        for threads in (int(t) for t in args.threads.split(",")):
+            throughput, latencies = run_cell(workers, threads, args.senders, args.duration)
+            print(f"{workers:>7} {threads or 'default':>8} {throughput:>8.1f} "
+                  f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} "
+                  f"{percentile(latencies, 99) * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
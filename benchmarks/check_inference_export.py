@@ -0,0 +1,126 @@
+# check_inference_export.py
+#
+# Accuracy regression check and latency/memory comparison of the inference
+# modes of inference_export.py. For each of eager, frozen and int8, a fresh
+# process loads the latest model, runs the stories in tests/test_stories.yml
+# through rasa.core.test, parses utterances from data/nlu.yml and runs full
+# turns. Reports story and action accuracy, intent agreement with eager,
+# latency and RSS/PSS after loading. Exits non-zero when a mode loses more
+# than --max-drop story accuracy or intent agreement. Run
+# `python inference_export.py` first.
+#
+#   python benchmarks/check_inference_export.py [--utterances 300] [--max-drop 0.01]
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from bench_nlu_batching import percentile
+
+STORIES = "tests/test_stories.yml"
+
+
+async def evaluate(agent, utterances, turns):
+    import rasa.core.test
+
+    with tempfile.TemporaryDirectory() as out_directory:
+        stories = await rasa.core.test.test(STORIES, agent, out_directory=out_directory,
+                                            disable_plotting=True, errors=False, warnings=False)
+
+    intents, parse_latencies = [], []
+    for text in utterances:
+        start = time.perf_counter()
+        parsed = await agent.parse_message(text)
+        parse_latencies.append(time.perf_counter() - start)
+        intents.append(parsed["intent"]["name"])
+
+    turn_latencies = []
+    for i, text in enumerate(utterances[:turns]):
+        start = time.perf_counter()
+        await agent.handle_text(text, sender_id=f"check_export_{i}")
+        turn_latencies.append(time.perf_counter() - start)
+    return stories, intents, parse_latencies, turn_latencies
+
+
+def run_mode(mode, utterance_count, turns):
+    from startup import import_rasa, load_agent
+    from action_executor import InProcessActionEndpoint
+    from inference_export import install_exported
+    from model_manager import ModelManager
+    from nlu_data import sample_utterances
+    from prefork import memory_usage
+
+    Agent = import_rasa()
+    model_path = ModelManager().latest_model()
+    agent = load_agent(Agent, model_path, {}, action_endpoint=InProcessActionEndpoint())
+    installed = install_exported(agent, model_path, mode)
+    if mode != "eager" and not installed:
+        sys.exit(f"No {mode} export for {model_path}, run `python inference_export.py {model_path}`")
+
+    utterances = sample_utterances(utterance_count, seed=3)
+    stories, intents, parse_latencies, turn_latencies = asyncio.run(evaluate(agent, utterances, turns))
+    memory = memory_usage()
+    return {
+        "mode": mode,
+        "story_accuracy": stories.get("accuracy"),
+        "action_f1": stories.get("f1"),
+        "intents": intents,
+        "parse_p50_ms": percentile(parse_latencies, 50) * 1000,
+        "parse_p95_ms": percentile(parse_latencies, 95) * 1000,
+        "turn_p50_ms": percentile(turn_latencies, 50) * 1000,
+        "turn_p95_ms": percentile(turn_latencies, 95) * 1000,
+        "rss_mb": memory.get("Rss", 0) / 2 ** 20,
+        "pss_mb": memory.get("Pss", 0) / 2 ** 20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="eager,frozen,int8")
+    parser.add_argument("--utterances", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--max-drop", type=float, default=0.01)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.utterances, args.turns)))
+        return
+
+    results = []
+    for mode in args.modes.split(","):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode,
+             "--utterances", str(args.utterances), "--turns", str(args.turns)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    baseline = results[0]
+    print(f"{'mode':<7} {'stories':>8} {'act f1':>7} {'intents':>8} {'parse p50':>10} {'p95':>7} "
+          f"{'turn p50':>9} {'p95':>7} {'RSS MB':>7} {'PSS MB':>7}")
+    failed = False
+    for r in results:
+        agreement = sum(a == b for a, b in zip(r["intents"], baseline["intents"])) / len(baseline["intents"])
+        print(f"{r['mode']:<7} {r['story_accuracy']:>8.3f} {r['action_f1']:>7.3f} {agreement:>8.2%} "
+              f"{r['parse_p50_ms']:>8.1f}ms {r['parse_p95_ms']:>5.1f}ms "
+              f"{r['turn_p50_ms']:>7.1f}ms {r['turn_p95_ms']:>5.1f}ms {r['rss_mb']:>7.0f} {r['pss_mb']:>7.0f}")
+        if (baseline["story_accuracy"] - r["story_accuracy"] > args.max_drop
+                or 1.0 - agreement > args.max_drop):
+            failed = True
+            print(f"  {r['mode']} regressed by more than {args.max_drop:.1%}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
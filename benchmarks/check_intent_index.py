@@ -0,0 +1,104 @@
+# check_intent_index.py
+#
+# Consistency check of the intent fast path against DIET. Every example in
+# data/nlu.yml, plus variants of it (shouted with punctuation, words
+# reversed, one character changed), is looked up in the IntentIndex. Each
+# hit is compared with the intent the loaded model predicts for the same
+# text. Exits non-zero when agreement drops below --min-agreement.
+#
+#   python benchmarks/check_intent_index.py [--threshold 0.9] [--limit 1000]
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from intent_index import IntentIndex
+from nlu_data import load_nlu_examples
+from startup import import_rasa, load_agent
+
+
+def variants(text, rng):
+    yield "verbatim", text
+    yield "shouted", text.upper() + "!!"
+    words = text.split()
+    if len(words) > 1:
+        yield "reversed", " ".join(reversed(words))
+    if len(text) > 8:
+        i = rng.randrange(len(text))
+        yield "typo", text[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1:]
+
+
+async def check(agent, index, examples, rng):
+    agree = Counter()
+    total = Counter()
+    misses = Counter()
+    disagreements = []
+    index_seconds = diet_seconds = 0.0
+    for intent, text in examples:
+        for variant, candidate in variants(text, rng):
+            start = time.perf_counter()
+            found = index.lookup(candidate)
+            index_seconds += time.perf_counter() - start
+            if found is None:
+                misses[variant] += 1
+                continue
+            start = time.perf_counter()
+            parsed = await agent.parse_message(candidate)
+            diet_seconds += time.perf_counter() - start
+
+            kind = found[2]
+            total[kind] += 1
+            if parsed["intent"]["name"] == found[0]:
+                agree[kind] += 1
+            else:
+                disagreements.append((candidate, found, parsed["intent"]))
+    return agree, total, misses, disagreements, index_seconds, diet_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--limit", type=int, default=0, help="check only this many examples")
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    args = parser.parse_args()
+
+    Agent = import_rasa()
+    from model_manager import ModelManager
+    agent = load_agent(Agent, ModelManager().latest_model(), {})
+    index = IntentIndex.from_nlu_file(intents=set(agent.domain.intents), threshold=args.threshold)
+
+    rng = random.Random(0)
+    examples = load_nlu_examples()
+    if args.limit:
+        examples = rng.sample(examples, min(args.limit, len(examples)))
+
+    agree, total, misses, disagreements, index_s, diet_s = asyncio.run(check(agent, index, examples, rng))
+
+    lookups = sum(total.values()) + sum(misses.values())
+    print(f"{len(examples)} examples, {lookups} lookups, {sum(total.values())} hits")
+    for kind in ("exact", "reordered", "similar"):
+        if total[kind]:
+            print(f"  {kind:<10} {total[kind]:>6} hits, {agree[kind] / total[kind]:.2%} agree with DIET")
+    print(f"  misses by variant: {dict(misses)}")
+    print(f"Mean lookup {index_s / lookups * 1e6:.1f} us, mean DIET parse "
+          f"{diet_s / max(1, sum(total.values())) * 1000:.2f} ms")
+    for text, found, predicted in disagreements[:20]:
+        print(f"  DISAGREE {text!r}: index {found[0]} ({found[2]}, {found[1]}) "
+              f"vs DIET {predicted['name']} ({predicted['confidence']:.2f})")
+
+    agreement = sum(agree.values()) / max(1, sum(total.values()))
+    print(f"Overall agreement {agreement:.2%}")
+    if agreement < args.min_agreement:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# load_test.py
+#
+# Closed-loop load test for the webhook: C concurrent clients each send a
+# message, wait for the reply and send the next one. Reports requests/sec
+# and latency percentiles for every target, e.g. to compare the Flask and
+# ASGI front ends:
+#
+#   python app.py    # serves on :5005
+#   python benchmarks/load_test.py --target flask=http://localhost:5005
+#   python asgi.py   # serves on :5005
+#   python benchmarks/load_test.py --target asgi=http://localhost:5005
+#
+# Each client switches to a fresh sender id before hitting MESSAGE_LIMIT so
+# the measurements cover real model turns, not the limit short-circuit.
+# Clients send faster than ADMISSION_SENDER_RATE allows and share one IP,
+# so start the server with ADMISSION_SENDER_RATE=0 and ADMISSION_IP_RATE=0
+# (or raised above the offered load), or admission control answers most of
+# them 429.
+
+import argparse
+import asyncio
+import itertools
+import time
+
+import aiohttp
+
+MESSAGES = [
+    "hi",
+    "what programs does ccs offer?",
+    "how do I enroll?",
+    "where is the registrar?",
+    "tell me about the college of engineering",
+    "what scholarships are available?",
+    "thank you",
+]
+
+MESSAGES_PER_SENDER = 9
+
+# Keeps sender ids unique across repeated runs against the same server
+RUN_ID = int(time.time())
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+async def client(session, url, client_id, deadline, latencies, errors):
+    for n in itertools.count():
+        if time.perf_counter() >= deadline:
+            return
+        sender = f"load_{RUN_ID}_{client_id}_{n // MESSAGES_PER_SENDER}"
+        payload = {"sender": sender, "message": MESSAGES[n % len(MESSAGES)]}
+        start = time.perf_counter()
+        try:
+            async with session.post(url, json=payload) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    errors.append(resp.status)
+                    continue
+        except aiohttp.ClientError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_target(label, base_url, concurrency, duration, warmup):
+    global RUN_ID
+    RUN_ID += 1
+    url = base_url.rstrip("/") + "/webhooks/rest/webhook"
+    timeout = aiohttp.ClientTimeout(total=120)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        if warmup:
+            await client(session, url, "warmup", time.perf_counter() + warmup, [], [])
+
+        latencies, errors = [], []
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*[
+            client(session, url, i, deadline, latencies, errors) for i in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    print(f"{label:>8} {concurrency:>6} {len(latencies) / elapsed:>9.1f} "
+          f"{percentile(latencies, 50) * 1000:>9.1f} "
+          f"{percentile(latencies, 95) * 1000:>9.1f} "
+          f"{percentile(latencies, 99) * 1000:>9.1f} {len(errors):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", action="append", required=True,
+                        help="label=base_url, may be given several times")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per run")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of warm-up traffic")
+    args = parser.parse_args()
+
+    print(f"{'target':>8} {'conc':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for target in args.target:
+        label, _, base_url = target.partition("=")
+        for concurrency in args.concurrency:
+            asyncio.run(run_target(label, base_url, concurrency, args.duration, args.warmup))
+
+
+if __name__ == '__main__':
+    main()
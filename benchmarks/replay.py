@@ -0,0 +1,272 @@
+# replay.py
+#
+# Replays the recorded conversations in chat_histories/ against the webhook
+# (and/or synthetic sessions built from data/nlu.yml examples). Sessions
+# arrive open-loop: a new one starts on schedule whether or not earlier ones
+# have been answered, either as a Poisson process at --rate sessions/sec or
+# at their recorded start times. Within a session the turns run in order and
+# the recorded think time between them is kept, divided by --speedup.
+# Reports throughput, latency percentiles and errors, and diffs the bot
+# replies against the recorded ones. Replies that are variants of the same
+# domain.yml response count as a match. Every session comes from one IP, so
+# start the server with ADMISSION_IP_RATE raised above the replayed turn
+# rate (or 0 to turn it off) unless that limit is under test.
+#
+#   python asgi.py   # serves on :5005
+#   python benchmarks/replay.py [--url http://localhost:5005] [--rate 2] [--speedup 10]
+#   python benchmarks/replay.py --arrivals recorded --speedup 3600 --diff-out replay_diffs.json
+#   python benchmarks/replay.py --no-histories --synthesize 200 --rate 5
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import aiohttp
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from load_test import RUN_ID, percentile
+from nlu_data import sample_utterances
+
+HISTORY_GLOB = "chat_histories/chat_history_*.txt"
+LINE = re.compile(r"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] (User|Bot|System|SYSTEM): ?(.*)$")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class Turn:
+    def __init__(self, at, text):
+        self.at = at
+        self.text = text
+        # Recorded bot replies; None when the turn was cut off by the message limit
+        self.replies = []
+
+
+class Session:
+    def __init__(self, name, started=None):
+        self.name = name
+        self.started = started
+        self.turns = []
+
+    def think_times(self, speedup, max_think):
+        """Seconds to wait before each turn, scaled down by `speedup`."""
+        waits, previous = [], None
+        for turn in self.turns:
+            gap = (turn.at - previous).total_seconds() if previous is not None and turn.at else 0.0
+            waits.append(min(max(gap, 0.0) / speedup, max_think))
+            previous = turn.at
+        return waits
+
+
+def parse_history(path):
+    """Read one chat history file into a Session. Continuation lines belong to the entry above."""
+    session = Session(os.path.basename(path))
+    entry = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("Started: "):
+                session.started = datetime.strptime(line[len("Started: "):], TIME_FORMAT)
+                continue
+            match = LINE.match(line)
+            if match is None:
+                if entry is not None and not line.startswith("=" * 10):
+                    entry.append(line)
+                continue
+            at, speaker, text = match.groups()
+            entry = None
+            if speaker == "User":
+                entry = [text]
+                session.turns.append(Turn(datetime.strptime(at, TIME_FORMAT), entry))
+            elif speaker == "Bot" and session.turns:
+                entry = [text]
+                session.turns[-1].replies.append(entry)
+            elif speaker == "SYSTEM" and text == "Message limit reached" and session.turns:
+                if not session.turns[-1].replies:
+                    session.turns[-1].replies = None
+    for turn in session.turns:
+        turn.text = "\n".join(turn.text)
+        if turn.replies is not None:
+            turn.replies = ["\n".join(reply) for reply in turn.replies]
+    if session.started is None and session.turns:
+        session.started = session.turns[0].at
+    return session
+
+
+def load_histories(pattern=HISTORY_GLOB):
+    sessions = [parse_history(path) for path in sorted(glob.glob(pattern))]
+    return [session for session in sessions if session.turns]
+
+
+def synthesize(count, turns, think, seed=0):
+    """Sessions of NLU example utterances with exponential think times and no recorded replies."""
+    rng = random.Random(seed)
+    utterances = sample_utterances(count * turns, seed=seed)
+    sessions = []
+    for i in range(count):
+        session = Session(f"synthetic_{i}")
+        at = datetime(2000, 1, 1)
+        for text in utterances[i * turns:(i + 1) * turns]:
+            at += timedelta(seconds=rng.expovariate(1.0 / think))
+            turn = Turn(at, text)
+            turn.replies = None
+            session.turns.append(turn)
+        session.started = session.turns[0].at if session.turns else at
+        sessions.append(session)
+    return [session for session in sessions if session.turns]
+
+
+def response_variants(path="domain.yml"):
+    """{normalized text: response name} for every text variant of the domain's responses."""
+    with open(path, "r", encoding="utf-8") as f:
+        domain = yaml.safe_load(f) or {}
+    variants = {}
+    for name, texts in (domain.get("responses") or {}).items():
+        for variant in texts or []:
+            if isinstance(variant, dict) and variant.get("text"):
+                variants[normalize(variant["text"])] = name
+    return variants
+
+
+def normalize(text):
+    return " ".join(text.split())
+
+
+def canonical(texts, variants):
+    return [variants.get(normalize(text), normalize(text)) for text in texts]
+
+
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.errors = Counter()
+        self.compared = 0
+        self.diffs = []
+        self.sessions_done = 0
+
+
+async def replay_session(session, http, url, sender, speedup, max_think, variants, results):
+    for turn, wait in zip(session.turns, session.think_times(speedup, max_think)):
+        await asyncio.sleep(wait)
+        start = time.perf_counter()
+        try:
+            async with http.post(url, json={"sender": sender, "message": turn.text}) as resp:
+                body = await resp.json(content_type=None)
+                if resp.status != 200:
+                    results.errors[resp.status] += 1
+                    continue
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            results.errors[type(e).__name__] += 1
+            continue
+        results.latencies.append(time.perf_counter() - start)
+
+        if turn.replies is None:
+            continue
+        replies = [message.get("text", "") for message in body if isinstance(message, dict)]
+        results.compared += 1
+        if canonical(replies, variants) != canonical(turn.replies, variants):
+            results.diffs.append({"session": session.name, "sender": sender, "message": turn.text,
+                                  "recorded": turn.replies, "replayed": replies})
+    results.sessions_done += 1
+
+
+def arrival_offsets(sessions, arrivals, rate, speedup, seed=0):
+    if arrivals == "recorded":
+        first = min(session.started for session in sessions)
+        return [(session.started - first).total_seconds() / speedup for session in sessions]
+    rng = random.Random(seed)
+    offsets, at = [], 0.0
+    for _ in sessions:
+        offsets.append(at)
+        at += rng.expovariate(rate)
+    return offsets
+
+
+async def replay(sessions, args, variants):
+    url = args.url.rstrip("/") + "/webhooks/rest/webhook"
+    offsets = arrival_offsets(sessions, args.arrivals, args.rate, args.speedup)
+    schedule = sorted(zip(offsets, range(len(sessions))))
+    results = Results()
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+        tasks = []
+        start = time.perf_counter()
+        for offset, i in schedule:
+            if args.duration and offset > args.duration:
+                break
+            await asyncio.sleep(max(0.0, start + offset - time.perf_counter()))
+            sender = f"replay_{RUN_ID}_{i}"
+            tasks.append(asyncio.ensure_future(replay_session(
+                sessions[i], http, url, sender, args.speedup, args.max_think, variants, results)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return results, len(tasks), elapsed
+
+
+def report(results, started, elapsed, show_diffs):
+    latencies = results.latencies
+    errors = sum(results.errors.values())
+    print(f"{started} sessions started, {results.sessions_done} finished in {elapsed:.1f}s")
+    print(f"{len(latencies)} turns answered, {len(latencies) / elapsed:.1f} turns/s, {errors} errors"
+          + (f" ({', '.join(f'{k}: {v}' for k, v in results.errors.most_common())})" if errors else ""))
+    if latencies:
+        print(f"latency p50 {percentile(latencies, 50) * 1000:.0f}ms  p95 {percentile(latencies, 95) * 1000:.0f}ms  "
+              f"p99 {percentile(latencies, 99) * 1000:.0f}ms  max {max(latencies) * 1000:.0f}ms")
+    if results.compared:
+        matched = results.compared - len(results.diffs)
+        print(f"replies: {matched}/{results.compared} match the recording ({matched / results.compared:.1%})")
+    for diff in results.diffs[:show_diffs]:
+        print(f"\n  {diff['session']}: {diff['message']!r}")
+        print(f"    recorded: {diff['recorded']}")
+        print(f"    replayed: {diff['replayed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:5005")
+    parser.add_argument("--histories", default=HISTORY_GLOB, help="glob of chat history files to replay")
+    parser.add_argument("--no-histories", action="store_true", help="replay synthetic sessions only")
+    parser.add_argument("--synthesize", type=int, default=0, help="also replay N sessions built from data/nlu.yml")
+    parser.add_argument("--turns", type=int, default=5, help="turns per synthetic session")
+    parser.add_argument("--think", type=float, default=20.0, help="mean think time of synthetic sessions, seconds")
+    parser.add_argument("--arrivals", choices=("poisson", "recorded"), default="poisson")
+    parser.add_argument("--rate", type=float, default=1.0, help="poisson arrivals: sessions per second")
+    parser.add_argument("--speedup", type=float, default=10.0, help="divide recorded times by this factor")
+    parser.add_argument("--max-think", type=float, default=60.0, help="cap on one scaled think time, seconds")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the session set this many times")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop starting sessions after N seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout, seconds")
+    parser.add_argument("--show-diffs", type=int, default=10, help="mismatching replies to print")
+    parser.add_argument("--diff-out", help="write every mismatching reply to this JSON file")
+    args = parser.parse_args()
+
+    sessions = [] if args.no_histories else load_histories(args.histories)
+    if args.synthesize:
+        sessions += synthesize(args.synthesize, args.turns, args.think)
+    if not sessions:
+        sys.exit("No sessions to replay")
+    sessions = sessions * max(1, args.repeat)
+    print(f"Replaying {len(sessions)} sessions, {sum(len(s.turns) for s in sessions)} turns, against {args.url} "
+          f"({args.arrivals} arrivals, speed-up {args.speedup:g}x)")
+
+    results, started, elapsed = asyncio.run(replay(sessions, args, response_variants()))
+    report(results, started, elapsed, args.show_diffs)
+    if args.diff_out:
+        with open(args.diff_out, "w", encoding="utf-8") as f:
+            json.dump(results.diffs, f, indent=2, ensure_ascii=False)
+        print(f"\n{len(results.diffs)} mismatches written to {args.diff_out}")
+
+
+if __name__ == '__main__':
+    main()
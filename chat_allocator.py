@@ -0,0 +1,72 @@
+# chat_allocator.py
+
+import glob
+import os
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ChatFileAllocator:
+    """Hands out chat history filenames without scanning the directory.
+
+    The next sequence number lives in a small state file next to the chat
+    histories. It is read once at startup (falling back to a one-time scan of
+    the existing files when the state file is missing) and rewritten
+    atomically after every allocation, so numbering survives restarts.
+
+    Each new file is created with O_EXCL, so two requests, or two processes
+    sharing the directory, can never be handed the same file.
+    """
+
+    FILENAME_FORMAT = "chat_history_{:03d}.txt"
+    FILENAME_PATTERN = re.compile(r'chat_history_(\d+)\.txt')
+
+    def __init__(self, directory, state_file=".next_chat_number"):
+        self.directory = directory
+        self.state_path = os.path.join(directory, state_file)
+        self._lock = threading.Lock()
+        self._next = self._load()
+
+    def allocate(self):
+        """Reserve and create the next chat history file, returning its path."""
+        with self._lock:
+            number = self._next
+            while True:
+                path = os.path.join(self.directory, self.FILENAME_FORMAT.format(number))
+                try:
+                    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                except FileExistsError:
+                    # Taken by another process sharing this directory
+                    number += 1
+                    continue
+                os.close(fd)
+                break
+            self._next = number + 1
+            self._save()
+            return path
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            pass
+
+        # No usable state yet: seed it from the files already on disk
+        numbers = []
+        for filename in glob.glob(os.path.join(self.directory, "chat_history_*.txt")):
+            match = self.FILENAME_PATTERN.search(os.path.basename(filename))
+            if match:
+                numbers.append(int(match.group(1)))
+        next_number = max(numbers) + 1 if numbers else 1
+        logger.info(f"Seeded chat file numbering at {next_number} from {len(numbers)} existing files")
+        return next_number
+
+    def _save(self):
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(self._next))
+        os.replace(tmp_path, self.state_path)
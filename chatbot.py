@@ -0,0 +1,648 @@
+# chatbot.py
+#
+# Shared chatbot state and webhook logic. app.py (Flask) and asgi.py (ASGI)
+# are thin HTTP front ends over the functions here, so both serve the same
+# loaded Agent, sessions and chat histories.
+
+import asyncio
+import contextlib
+import os
+import logging
+import threading
+import time
+from history_writer import HistoryWriter
+from chat_allocator import ChatFileAllocator
+from sessions import create_session_store, session_expiration_seconds
+from concurrency import SenderGate, Overloaded
+from admission import Admission, Rejected
+from startup import Startup
+from model_manager import ModelManager
+from response_cache import ResponseCache
+from nlu_batcher import NLUBatcher
+from intent_index import IntentIndex
+from inference_pool import InferencePool
+from prefork import memory_usage
+import thread_budget
+import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Feedback message template
+FEEDBACK_MESSAGE = "❌ You've reached the message limit. Thank you for testing our chatbot. Your participation in our study is crucial and would be greatly appreciated. <a href='https://2ly.link/26ajD'>Please continue here to provide your feedback</a>"
+
+# Message limit
+MESSAGE_LIMIT = 10
+
+# Directory for chat histories
+CHAT_HISTORY_DIR = "chat_histories"
+
+# How long the history writer batches lines before appending them, and
+# whether every append is fsync'ed to disk
+HISTORY_FLUSH_INTERVAL = float(os.environ.get("HISTORY_FLUSH_INTERVAL", "0.5"))
+HISTORY_FSYNC = os.environ.get("HISTORY_FSYNC", "0") == "1"
+
+history_writer = HistoryWriter(flush_interval=HISTORY_FLUSH_INTERVAL, fsync=HISTORY_FSYNC)
+
+# Where sessions are kept: "memory" for a single process, "sqlite" to share
+# message counts between several worker processes
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.environ.get("SESSION_DB_PATH", "sessions.db")
+
+# Upper bound on sessions kept in memory; idle ones expire with the Rasa session
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "10000"))
+
+# Turns of one sender run in order; across senders at most MAX_CONCURRENT_TURNS
+# run at once and up to MAX_QUEUED_TURNS wait before requests get HTTP 429
+MAX_CONCURRENT_TURNS = int(os.environ.get("MAX_CONCURRENT_TURNS", "16"))
+MAX_QUEUED_TURNS = int(os.environ.get("MAX_QUEUED_TURNS", "200"))
+MAX_QUEUED_PER_SENDER = int(os.environ.get("MAX_QUEUED_PER_SENDER", "5"))
+RETRY_AFTER_SECONDS = int(os.environ.get("RETRY_AFTER_SECONDS", "1"))
+
+sender_gate = SenderGate(
+    max_concurrency=MAX_CONCURRENT_TURNS,
+    max_queue=MAX_QUEUED_TURNS,
+    max_pending_per_sender=MAX_QUEUED_PER_SENDER,
+    retry_after=RETRY_AFTER_SECONDS
+)
+
+# Utterances sampled from data/nlu.yml to warm the model up before reporting
+# ready, and how many of them also run a full dialogue turn
+WARMUP_SAMPLES = int(os.environ.get("WARMUP_SAMPLES", "20"))
+WARMUP_TURNS = int(os.environ.get("WARMUP_TURNS", "5"))
+
+# Newer archives in models/ are picked up every MODEL_POLL_INTERVAL seconds;
+# at most MAX_RESIDENT_MODELS agents are kept in memory for quick rollback
+MODEL_POLL_INTERVAL = float(os.environ.get("MODEL_POLL_INTERVAL", "10"))
+MAX_RESIDENT_MODELS = int(os.environ.get("MAX_RESIDENT_MODELS", "2"))
+
+# Custom actions run over HTTP on the action server from endpoints.yml, or
+# "inprocess" by calling the classes in actions/ directly
+ACTION_EXECUTOR = os.environ.get("ACTION_EXECUTOR", "http")
+
+# Opt-in cache of answers to context-free FAQ intents, see response_cache.yml
+RESPONSE_CACHE_CONFIG = os.environ.get("RESPONSE_CACHE_CONFIG", "response_cache.yml")
+
+# Messages arriving within NLU_BATCH_WINDOW_MS of each other are parsed in
+# one NLU graph run of up to NLU_MAX_BATCH messages; 0 parses each alone
+NLU_BATCH_WINDOW_MS = float(os.environ.get("NLU_BATCH_WINDOW_MS", "10"))
+NLU_MAX_BATCH = int(os.environ.get("NLU_MAX_BATCH", "32"))
+
+# Messages that match a training example in data/nlu.yml verbatim or nearly
+# so (similarity >= INTENT_INDEX_THRESHOLD) take their intent from an index
+# instead of running SpacyNLP and DIET
+INTENT_INDEX = os.environ.get("INTENT_INDEX", "1") == "1"
+INTENT_INDEX_THRESHOLD = float(os.environ.get("INTENT_INDEX_THRESHOLD", "0.9"))
+
+# NLU parsing and policy prediction run on the event loop ("loop"), on
+# INFERENCE_WORKERS threads sharing the model ("thread"), or on as many
+# pre-forked processes with a model copy each ("process"; needs fork(), else
+# threads are used). In process mode NLU runs on the workers and
+# NLU_BATCH_WINDOW_MS is ignored; otherwise batching, if on, takes NLU
+INFERENCE_EXECUTOR = os.environ.get("INFERENCE_EXECUTOR", "loop")
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "4"))
+
+# TF models run as trained ("eager"), or from the frozen or int8-quantized
+# graphs written by `python inference_export.py <archive>`
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "eager")
+
+# Admission control before any model work: token buckets of
+# ADMISSION_IP_RATE/s (bursts of ADMISSION_IP_BURST) per client IP and of
+# ADMISSION_SENDER_RATE/s per sender id, and at most ADMISSION_MAX_IN_FLIGHT
+# requests in flight per process. A rate of 0 turns that bucket off.
+# TRUSTED_PROXIES is the number of reverse proxies whose X-Forwarded-For
+# header names the client IP; without it every client behind the proxy
+# shares one IP bucket. Where many users share one NAT address (a campus
+# network), raise ADMISSION_IP_RATE/ADMISSION_IP_BURST or set the rate to 0
+ADMISSION_IP_RATE = float(os.environ.get("ADMISSION_IP_RATE", "10"))
+ADMISSION_IP_BURST = float(os.environ.get("ADMISSION_IP_BURST", "60"))
+ADMISSION_SENDER_RATE = float(os.environ.get("ADMISSION_SENDER_RATE", "1"))
+ADMISSION_SENDER_BURST = float(os.environ.get("ADMISSION_SENDER_BURST", "10"))
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "256"))
+ADMISSION_MAX_CLIENTS = int(os.environ.get("ADMISSION_MAX_CLIENTS", "100000"))
+TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", "0"))
+
+# Bulk requests carry at most BULK_MAX_MESSAGES messages and run turns of up
+# to BULK_CONCURRENCY senders at once, leaving room for interactive traffic
+BULK_MAX_MESSAGES = int(os.environ.get("BULK_MAX_MESSAGES", "1000"))
+BULK_CONCURRENCY = int(os.environ.get("BULK_CONCURRENCY", "8"))
+
+# Bearer token for the /admin endpoints and bulk evaluation runs; they are
+# disabled when unset
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+admission = Admission(
+    ip_rate=ADMISSION_IP_RATE,
+    ip_burst=ADMISSION_IP_BURST,
+    sender_rate=ADMISSION_SENDER_RATE,
+    sender_burst=ADMISSION_SENDER_BURST,
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    max_clients=ADMISSION_MAX_CLIENTS
+)
+
+# Create chat history directory if it doesn't exist
+if not os.path.exists(CHAT_HISTORY_DIR):
+    os.makedirs(CHAT_HISTORY_DIR)
+    print(f"Created chat history directory at {CHAT_HISTORY_DIR}")
+
+# Chat file numbering is loaded once here instead of scanning the directory per sender
+chat_file_allocator = ChatFileAllocator(CHAT_HISTORY_DIR)
+
+# Message counts and chat files per sender, evicted once the session expires
+session_store = create_session_store(
+    SESSION_BACKEND,
+    chat_file_allocator,
+    ttl=session_expiration_seconds(),
+    max_sessions=MAX_SESSIONS,
+    db_path=SESSION_DB_PATH
+)
+
+model_manager = ModelManager(
+    models_dir='models',
+    max_resident=MAX_RESIDENT_MODELS,
+    poll_interval=MODEL_POLL_INTERVAL,
+    warmup_samples=WARMUP_SAMPLES,
+    warmup_turns=WARMUP_TURNS,
+    action_executor=ACTION_EXECUTOR,
+    inference_mode=INFERENCE_MODE
+)
+
+response_cache = ResponseCache.from_config(RESPONSE_CACHE_CONFIG)
+# Answers from an older model must not outlive it; the key slots come from
+# the new domain before the cache is cleared
+model_manager.on_swap(lambda loaded: response_cache.use_domain(loaded.agent.domain))
+model_manager.on_swap(lambda loaded: response_cache.clear())
+
+nlu_batcher = NLUBatcher(window=NLU_BATCH_WINDOW_MS / 1000.0, max_batch=NLU_MAX_BATCH)
+
+# Rebuilt for every model, limited to the intents of its domain
+intent_index = None
+
+def rebuild_intent_index(loaded):
+    global intent_index
+    intent_index = IntentIndex.from_nlu_file(
+        intents=set(loaded.agent.domain.intents),
+        threshold=INTENT_INDEX_THRESHOLD,
+        agent=loaded.agent
+    )
+
+if INTENT_INDEX:
+    model_manager.on_swap(rebuild_intent_index)
+
+# Policy timing and predicted actions for /metrics and the chat histories
+model_manager.on_swap(lambda loaded: metrics.instrument_agent(loaded.agent))
+
+# Worker processes are forked here, before TensorFlow is imported
+inference_pool = InferencePool(mode=INFERENCE_EXECUTOR, workers=INFERENCE_WORKERS, max_models=MAX_RESIDENT_MODELS)
+inference_pool.start()
+model_manager.on_swap(lambda loaded: inference_pool.install(loaded.agent, loaded.path))
+
+# TensorFlow/Rasa imports, model loading and warm-up run in the background;
+# the webhook answers 503 until /health/ready reports ready
+startup = Startup(model_manager)
+startup.start()
+
+
+# The agent lives on one long-lived event loop. The ASGI server runs the
+# webhook on its own loop; sync callers (the Flask routes) submit work to a
+# background loop thread instead of starting a new loop per request.
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+def _shared_loop():
+    global _loop, _loop_pid
+    if _loop_pid != os.getpid():
+        with _loop_lock:
+            if _loop_pid != os.getpid():
+                _loop = asyncio.new_event_loop()
+                threading.Thread(target=_loop.run_forever, name="chatbot-loop", daemon=True).start()
+                _loop_pid = os.getpid()
+    return _loop
+
+def run_in_loop(coro):
+    """Run `coro` on the shared background event loop and wait for the result."""
+    return asyncio.run_coroutine_threadsafe(coro, _shared_loop()).result()
+
+def iterate_in_loop(agen):
+    """Iterate the async generator `agen` on the shared background event loop."""
+    loop = _shared_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        # Runs when the WSGI server closes the response after a client
+        # disconnect too, so the generator's own cleanup (cancelling the bulk
+        # workers) still happens
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+
+async def handle_webhook(data, on_message=None, client_ip=None):
+    """Handle one webhook request body from `client_ip`.
+
+    Returns (response body, HTTP status, extra headers). `on_message`, if
+    given, is called with each formatted bot message as soon as it exists.
+    """
+    start = time.perf_counter()
+    body, status, headers = await _handle_webhook(data, on_message, client_ip)
+    metrics.requests_total.inc(str(status))
+    if status == 200:
+        metrics.request_seconds.observe(time.perf_counter() - start)
+    return body, status, headers
+
+
+async def _handle_webhook(data, on_message, client_ip):
+    try:
+        data = data or {}
+        message = data.get('message')
+        sender_id = data.get('sender', 'default')
+
+        print(f"Received message: {message} from sender: {sender_id}")
+
+        if not message:
+            return {"error": "No message provided"}, 400, {}
+
+        # Rejected here, before the message costs any model work
+        with admission.admit(client_ip, sender_id):
+            if not startup.ready.is_set():
+                return {"error": f"Model is not ready yet ({startup.phase})"}, 503, {"Retry-After": "5"}
+
+            async with sender_gate.slot(sender_id):
+                return await handle_turn(sender_id, message, on_message), 200, {}
+
+    except (Overloaded, Rejected) as e:
+        return {"error": str(e)}, 429, {"Retry-After": str(e.retry_after)}
+    except Exception as e:
+        print(f"Error processing message: {e}")
+        return {"error": str(e)}, 500, {}
+
+
+async def stream_webhook(data, client_ip=None):
+    """Handle one webhook request body, yielding bot messages as the turn produces them.
+
+    Yields (HTTP status, extra headers) first. For status 200 every
+    formatted bot message follows, else the error body.
+    """
+    messages = asyncio.Queue()
+    task = asyncio.ensure_future(handle_webhook(data, on_message=messages.put_nowait, client_ip=client_ip))
+    started = False
+    while True:
+        getter = asyncio.ensure_future(messages.get())
+        done, _ = await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+        if getter not in done:
+            getter.cancel()
+            break
+        if not started:
+            started = True
+            yield 200, {}
+        yield getter.result()
+
+    body, status, headers = task.result()
+    if not started:
+        yield status, headers
+        if status != 200:
+            yield body
+            return
+    while not messages.empty():
+        yield messages.get_nowait()
+
+
+async def stream_bulk(data, authorization=None, client_ip=None):
+    """Handle a bulk request body, yielding one result per message as turns finish.
+
+    Body: {"messages": [{"sender": ..., "message": ...}, ...], "evaluation": false}.
+    Messages of one sender run in order; different senders run concurrently.
+    Evaluation runs (admin token required) skip the message limit, chat
+    histories and admission control; other messages are admitted one by
+    one, like webhook requests, and answered 429 when rejected. Yields
+    (HTTP status, extra headers) first, then either the error body or {"index", "sender", "status", "responses" or "error"} per
+    message.
+    """
+    data = data or {}
+    items = data.get('messages')
+    evaluation = bool(data.get('evaluation'))
+    if not isinstance(items, list) or not items:
+        yield 400, {}
+        yield {"error": "No messages provided"}
+        return
+    if len(items) > BULK_MAX_MESSAGES:
+        yield 413, {}
+        yield {"error": f"At most {BULK_MAX_MESSAGES} messages per request"}
+        return
+    if evaluation:
+        denied = check_admin(authorization)
+        if denied is not None:
+            yield denied[1], {}
+            yield denied[0]
+            return
+    if not startup.ready.is_set():
+        yield 503, {"Retry-After": "5"}
+        yield {"error": f"Model is not ready yet ({startup.phase})"}
+        return
+
+    results = asyncio.Queue()
+    by_sender = {}
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        sender_id = str(item.get('sender', 'default'))
+        if not item.get('message'):
+            results.put_nowait({"index": index, "sender": sender_id, "status": 400, "error": "No message provided"})
+            continue
+        by_sender.setdefault(sender_id, []).append((index, item['message']))
+    pending = list(by_sender)
+
+    async def run_senders():
+        while pending:
+            sender_id = pending.pop()
+            for index, message in by_sender[sender_id]:
+                results.put_nowait(await bulk_turn(index, sender_id, message, evaluation, client_ip))
+
+    yield 200, {}
+    workers = [asyncio.ensure_future(run_senders()) for _ in range(min(BULK_CONCURRENCY, len(by_sender)))]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        # The client went away; stop starting new turns
+        pending.clear()
+        for worker in workers:
+            worker.cancel()
+
+
+async def bulk_turn(index, sender_id, message, evaluation, client_ip):
+    result = {"index": index, "sender": sender_id}
+    try:
+        # Charged per message: a bulk request must not get around the
+        # buckets by spreading its messages over many sender ids
+        with contextlib.nullcontext() if evaluation else admission.admit(client_ip, sender_id):
+            async with sender_gate.slot(sender_id):
+                result["responses"] = await handle_turn(sender_id, message, persist=not evaluation)
+        result["status"] = 200
+    except (Overloaded, Rejected) as e:
+        result.update(status=429, error=str(e))
+    except Exception as e:
+        print(f"Error processing bulk message: {e}")
+        result.update(status=500, error=str(e))
+    metrics.requests_total.inc(str(result["status"]))
+    return result
+
+
+async def handle_turn(sender_id, message, on_message=None, persist=True):
+    """Run one conversation turn and return the formatted bot responses.
+
+    With `persist` False the message is not counted against the limit and
+    nothing is written to the chat history.
+    """
+    # Get timestamp for the message
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    if not persist:
+        with metrics.turn() as turn:
+            return await run_turn(turn, sender_id, message, 0, None, timestamp, [], on_message)
+
+    # Track message count and get chat history filename for this sender
+    session, is_new_chat = session_store.touch(sender_id)
+    chat_filename = session.filename
+    count = session.message_count
+
+    # Only the lines of this turn are appended to the chat history
+    history_lines = []
+    if is_new_chat:
+        # Add header information to new chat histories
+        history_lines.append(f"Chat History for User ID: {sender_id}")
+        history_lines.append(f"Started: {timestamp}")
+        history_lines.append("=" * 50)
+
+    history_lines.append(f"[{timestamp}] User: {message}")
+
+    # Limit logic - if already over limit, only return feedback message
+    if count > MESSAGE_LIMIT:
+        # Add a note that the limit was reached
+        history_lines.append(f"[{timestamp}] SYSTEM: Message limit reached")
+        history_writer.append(chat_filename, history_lines)
+
+        feedback = {
+            "recipient_id": sender_id,
+            "text": FEEDBACK_MESSAGE
+        }
+        if on_message is not None:
+            on_message(feedback)
+        return [feedback]
+
+    with metrics.turn() as turn:
+        return await run_turn(turn, sender_id, message, count, chat_filename, timestamp, history_lines,
+                              on_message)
+
+
+async def run_turn(turn, sender_id, message, count, chat_filename, timestamp, history_lines,
+                   on_message=None):
+    """Answer a message within the message limit, timing each stage into `turn`.
+
+    Nothing is written to the chat history when `chat_filename` is None.
+    """
+    # Messages of the agent go out while the turn runs; the rest at the end
+    streamed = []
+
+    def stream_response(response):
+        formatted = format_response(sender_id, response)
+        if formatted is not None:
+            streamed.append(formatted)
+            on_message(formatted)
+    on_response = stream_response if on_message is not None else None
+
+    # Get response from Rasa agent for normal messages; the turn finishes on
+    # this agent even if a newer model is swapped in meanwhile
+    with model_manager.acquire() as agent:
+        cached = None
+        if response_cache.enabled:
+            with metrics.stage("cache"):
+                cache_key = await response_cache.key_for(agent, sender_id, message)
+                cached = response_cache.get(cache_key)
+
+        if cached is not None:
+            with metrics.stage("cache"):
+                responses = cached.responses
+                await response_cache.replay_turn(agent, sender_id, message, cached.events)
+            record_cached_prediction(turn, cached.events)
+        else:
+            responses = await run_agent_turn(agent, sender_id, message, on_response)
+            if response_cache.enabled:
+                await response_cache.store_turn(agent, sender_id, cache_key, responses)
+
+    format_start = time.perf_counter()
+    formatted_responses = []
+
+    # Intent and action as the tracker recorded them for this turn
+    predicted_action, predicted_action_conf = turn.predicted_action()
+    history_lines.append(f"[{timestamp}] System: Predicted Intent: {turn.intent or 'none'} "
+                         f"with confidence {format_confidence(turn.intent_confidence)}")
+    history_lines.append(f"[{timestamp}] System: Predicted Action: {predicted_action or 'none'} "
+                         f"with confidence {format_confidence(predicted_action_conf)}")
+
+    # Format responses and store them
+    for response in responses:
+        formatted = format_response(sender_id, response)
+        if formatted is not None:
+            formatted_responses.append(formatted)
+            history_lines.append(f"[{timestamp}] Bot: {formatted['text']}")
+
+    # If this is exactly the 10th message, add feedback message as separate response
+    if count == MESSAGE_LIMIT:
+        # Add feedback message to the list of responses (as a separate bubble)
+        formatted_responses.append({
+            'recipient_id': sender_id,
+            'text': FEEDBACK_MESSAGE
+        })
+        history_lines.append(f"[{timestamp}] Bot: {FEEDBACK_MESSAGE}")
+        history_lines.append(f"[{timestamp}] SYSTEM: Message limit reached")
+    metrics.add_stage("formatting", time.perf_counter() - format_start)
+
+    if on_message is not None:
+        for formatted in formatted_responses[len(streamed):]:
+            on_message(formatted)
+
+    # Append this turn to the chat history file in the background
+    if chat_filename is not None:
+        with metrics.stage("persistence"):
+            history_writer.append(chat_filename, history_lines)
+
+    return formatted_responses
+
+
+def format_response(sender_id, response):
+    """The {"recipient_id", "text"} message sent to the client, or None for non-text responses."""
+    if isinstance(response, dict) and 'text' in response:
+        return {'recipient_id': sender_id, 'text': response['text']}
+    if isinstance(response, str):
+        return {'recipient_id': sender_id, 'text': response}
+    return None
+
+
+async def run_agent_turn(agent, sender_id, message, on_response=None):
+    """Run the turn on `agent`, taking the intent from the index when it hits.
+
+    `on_response` is called with each bot message as the dialogue loop sends it.
+    """
+    from rasa.core.channels.channel import UserMessage
+
+    with metrics.stage("nlu"):
+        index = intent_index
+        parse_data = None
+        source = "index"
+        if index is not None and index.serves(agent) and not message.startswith('/'):
+            parse_data = index.parse_data(message)
+        if parse_data is None:
+            # Batches run on the batcher's own thread; process workers take
+            # NLU off this process entirely, so they win over batching
+            if nlu_batcher.enabled and inference_pool.mode != "process":
+                parse_data = await nlu_batcher.parse(agent, message)
+            else:
+                parse_data = await inference_pool.parse(agent, message)
+            source = "diet"
+
+    intent = parse_data.get("intent") or {}
+    metrics.record_intent(intent.get("name"), intent.get("confidence"), source)
+    # Policy prediction and action calls are timed inside, see metrics.instrument_agent
+    output_channel = None
+    if on_response is not None:
+        from output_channel import StreamingOutputChannel
+        output_channel = StreamingOutputChannel(on_response)
+    return await agent.handle_message(
+        UserMessage(message, output_channel=output_channel, sender_id=sender_id, parse_data=parse_data))
+
+
+def record_cached_prediction(turn, events):
+    """Take the intent and actions of a cached turn from its recorded events."""
+    for event in events:
+        if event.get("event") == "user":
+            intent = (event.get("parse_data") or {}).get("intent") or {}
+            metrics.record_intent(intent.get("name"), intent.get("confidence"), "cache")
+        elif event.get("event") == "action":
+            turn.actions.append((event.get("name"), event.get("confidence")))
+
+
+def format_confidence(confidence):
+    return "N/A" if confidence is None else f"{confidence:.4f}"
+
+
+def get_readiness():
+    """Return (readiness report, HTTP status) for the readiness endpoint."""
+    return startup.status(), 200 if startup.ready.is_set() else 503
+
+
+def check_admin(authorization):
+    """None if `authorization` carries the admin token, else (error body, HTTP status)."""
+    if not ADMIN_TOKEN:
+        return {"error": "Admin endpoints are disabled, set ADMIN_TOKEN"}, 403
+    if authorization != f"Bearer {ADMIN_TOKEN}":
+        return {"error": "Unauthorized"}, 401
+    return None
+
+
+def handle_admin_model(method, data, authorization):
+    """Inspect, pin, roll back or unpin the served model.
+
+    POST bodies: {"action": "pin", "model": "<file>.tar.gz"},
+    {"action": "rollback"} or {"action": "unpin"}. Loading runs in the
+    background; poll GET for progress. Returns (body, HTTP status).
+    """
+    denied = check_admin(authorization)
+    if denied is not None:
+        return denied
+
+    if method == 'POST':
+        data = data or {}
+        action = data.get('action')
+        try:
+            if action == 'pin':
+                model_manager.pin(data.get('model') or '')
+            elif action == 'rollback':
+                model_manager.rollback()
+            elif action == 'unpin':
+                model_manager.unpin()
+            else:
+                return {"error": f"Unknown action: {action}"}, 400
+        except (FileNotFoundError, ValueError) as e:
+            return {"error": str(e)}, 400
+        return model_manager.status(), 202
+
+    return model_manager.status(), 200
+
+
+# Read at scrape time from the state the webhook already keeps
+metrics.registry.gauge("chatbot_active_turns", "Turns running now.", lambda: sender_gate.active)
+metrics.registry.gauge("chatbot_queued_turns", "Turns waiting for a slot.", lambda: sender_gate.waiting)
+metrics.registry.counter_from("chatbot_rejected_turns_total", "Turns rejected with HTTP 429 since start.",
+                              lambda: sender_gate.rejected)
+metrics.registry.counter_from("chatbot_admission_rejected_total", "Requests rejected by admission control.",
+                              lambda: dict(admission.rejected), label="reason")
+metrics.registry.gauge("chatbot_requests_in_flight", "Admitted requests not yet answered.",
+                       lambda: admission.in_flight)
+metrics.registry.counter_from("chatbot_response_cache_lookups_total", "Response cache lookups since start.",
+                              lambda: {"hit": response_cache.hits, "miss": response_cache.misses}, label="result")
+metrics.registry.gauge("chatbot_process_memory_bytes", "RSS and PSS of this worker process.",
+                       lambda: {kind.lower(): value for kind, value in memory_usage().items() if kind in ("Rss", "Pss")},
+                       label="kind")
+
+
+def get_metrics():
+    """Prometheus text exposition of the metrics, for GET /metrics."""
+    return metrics.registry.render()
+
+
+def get_stats():
+    return {
+        "startup": startup.status(),
+        "models": model_manager.status(),
+        "response_cache": response_cache.stats(),
+        "nlu_batching": nlu_batcher.stats(),
+        "intent_index": intent_index.stats() if intent_index is not None else None,
+        "inference": inference_pool.stats(),
+        "sessions": session_store.stats(),
+        "admission": admission.stats(),
+        "turns": sender_gate.stats(),
+        "process": {"pid": os.getpid(), "memory_bytes": memory_usage(), "threads": thread_budget.current()},
+    }
@@ -0,0 +1,89 @@
+# concurrency.py
+
+import asyncio
+import contextlib
+
+
+class Overloaded(Exception):
+    """Raised when a turn cannot be queued; maps to HTTP 429."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many queued messages, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _SenderEntry:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class SenderGate:
+    """Serializes turns per sender while letting different senders run in parallel.
+
+    Turns from one sender wait on that sender's lock, which is FIFO, so they
+    run strictly in arrival order. At most `max_concurrency` turns run at
+    once across all senders. Turns beyond that wait in a queue, and once
+    `max_queue` turns are waiting (or `max_pending_per_sender` for a single
+    sender) new ones are rejected with Overloaded instead of piling up.
+
+    Must only be used from one event loop.
+    """
+
+    def __init__(self, max_concurrency=16, max_queue=200, max_pending_per_sender=5, retry_after=1):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_pending_per_sender = max_pending_per_sender
+        self.retry_after = retry_after
+        self._senders = {}
+        # Created on first use so it belongs to the serving loop
+        self._semaphore = None
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, sender_id):
+        """Wait for this sender's turn and a free slot, or raise Overloaded."""
+        entry = self._senders.get(sender_id)
+        if (self.waiting >= self.max_queue
+                or (entry is not None and entry.pending >= self.max_pending_per_sender)):
+            self.rejected += 1
+            raise Overloaded(self.retry_after)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if entry is None:
+            entry = self._senders[sender_id] = _SenderEntry()
+
+        entry.pending += 1
+        self.waiting += 1
+        queued = True
+        try:
+            async with entry.lock:
+                async with self._semaphore:
+                    self.waiting -= 1
+                    queued = False
+                    self.active += 1
+                    try:
+                        yield
+                    finally:
+                        self.active -= 1
+        finally:
+            if queued:
+                self.waiting -= 1
+            entry.pending -= 1
+            if entry.pending == 0:
+                del self._senders[sender_id]
+
+    def stats(self):
+        return {
+            "active_turns": self.active,
+            "queued_turns": self.waiting,
+            "senders_in_flight": len(self._senders),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
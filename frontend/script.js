@@ -130,9 +130,29 @@ function scrollToBottom() {
 
 
 function sendMessageToServer(message) {
-    const url = 'https://alabchatmw.msuiit.edu.ph/webhooks/rest/webhook';
+    // Streaming endpoint: one JSON message per line, sent as soon as the bot has it
+    const url = 'https://alabchatmw.msuiit.edu.ph/webhooks/rest/webhook/stream';
     console.log('Sending message to server:', { message });
-    
+
+    let received = 0;
+    // Bubbles are typed one after another, in the order they arrive
+    let typing = Promise.resolve();
+
+    function showBotMessage(data) {
+        console.log('Received message:', data);
+        if (received === 0) {
+            removeTypingIndicator();
+            // Keep the input locked until the whole turn has arrived
+            isWaitingForResponse = true;
+        }
+        received++;
+        typing = typing.then(() => addMessageWithTypewriterEffect("bot", data.text));
+    }
+
+    function showLines(text) {
+        text.split('\n').filter(line => line.trim()).forEach(line => showBotMessage(JSON.parse(line)));
+    }
+
     fetch(url, {
         method: 'POST',
         headers: {
@@ -145,37 +165,59 @@ function sendMessageToServer(message) {
             message: message 
         })
     })
-    .then(response => {
+    .then(async response => {
         console.log('Response status:', response.status);
         if (!response.ok) {
             throw new Error(`Server responded with status: ${response.status}`);
         }
-        return response.json();
+        if (!response.body || !window.TextDecoder) {
+            // No ReadableStream support: show everything once the turn is done
+            showLines(await response.text());
+            return;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffered += decoder.decode(value, { stream: true });
+            const newline = buffered.lastIndexOf('\n');
+            if (newline >= 0) {
+                showLines(buffered.slice(0, newline));
+                buffered = buffered.slice(newline + 1);
+            }
+        }
+        showLines(buffered + decoder.decode());
     })
-    .then(data => {
-        console.log('Received response:', data);
-        removeTypingIndicator();
-        
-        if (Array.isArray(data) && data.length > 0) {
-            // Combine multiple messages if present
-            const messages = data.map(response => response.text).join('\n\n');
-            addMessageWithTypewriterEffect("bot", messages);
-        } else {
+    .then(() => {
+        if (received === 0) {
+            removeTypingIndicator();
             addMessageWithTypewriterEffect("bot", "I'm not sure how to respond to that.");
         }
+        typing.then(() => { isWaitingForResponse = false; });
     })
     .catch((error) => {
         console.error('Network or parsing error:', error);
         removeTypingIndicator();
-        addMessageWithTypewriterEffect(
-            "bot", 
-            `Sorry, I encountered an error: ${error.message}. Please ensure the Rasa server is running on port 5005.`
-        );
+        typing.then(() => {
+            isWaitingForResponse = false;
+            addMessageWithTypewriterEffect(
+                "bot", 
+                `Sorry, I encountered an error: ${error.message}. Please ensure the Rasa server is running on port 5005.`
+            );
+        });
     });
 }
 
 
+// Returns a promise that resolves once the whole message is typed
 function addMessageWithTypewriterEffect(sender, message) {
+    let finished;
+    const done = new Promise(resolve => { finished = resolve; });
     const messagesDiv = document.getElementById("messages");
     const messageContainer = document.createElement("div");
     const messageLabel = document.createElement("div");
@@ -233,10 +275,13 @@ function addMessageWithTypewriterEffect(sender, message) {
                 charIndex = 0;
                 setTimeout(typeWriter, 30);
             }
+        } else {
+            finished();
         }
     }
 
     typeWriter();
+    return done;
 }
 
 
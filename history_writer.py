@@ -0,0 +1,140 @@
+# history_writer.py
+
+import atexit
+import os
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _read_at(fd, size, offset):
+    # os.pread does not exist on Windows; O_APPEND writes ignore the offset
+    os.lseek(fd, offset, os.SEEK_SET)
+    chunks = []
+    while size > 0:
+        chunk = os.read(fd, size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class HistoryWriter:
+    """Append-only, batched writer for the chat history files.
+
+    The webhook hands over only the new lines of each turn. A background
+    thread collects them from every sender, groups them per file and appends
+    them once per flush interval, so a request never waits on disk I/O.
+
+    Every chunk written ends with a newline. If the process dies in the
+    middle of a write, the torn tail after the last newline is cut off the
+    next time the file is opened, so a partially written line is never left
+    behind.
+    """
+
+    def __init__(self, flush_interval=0.5, fsync=False, max_batch=1000):
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._checked_files = set()
+        self.lines_written = 0
+        self.flushes = 0
+
+    def append(self, path, lines):
+        """Queue lines for `path`. Returns immediately."""
+        if not lines:
+            return
+        self._ensure_started()
+        self._queue.put((path, "".join(line + "\n" for line in lines)))
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so a forked worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._checked_files = set()
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Give other senders until the flush interval to join this batch
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            pending = {}
+            for path, data in batch:
+                pending.setdefault(path, []).append(data)
+
+            for path, chunks in pending.items():
+                try:
+                    self._write(path, "".join(chunks))
+                except Exception as e:
+                    # One bad write must not stop the thread: the queue would
+                    # never drain and flush() would hang
+                    logger.error(f"Failed to write chat history {path}: {e}")
+
+            self.flushes += 1
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, path, data):
+        # O_BINARY keeps Windows from translating the newlines
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            if path not in self._checked_files:
+                self._repair(fd)
+                self._checked_files.add(path)
+            payload = data.encode("utf-8")
+            view = memoryview(payload)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if self.fsync:
+                os.fsync(fd)
+            self.lines_written += data.count("\n")
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _repair(fd):
+        """Drop a torn, newline-less tail left by an interrupted write."""
+        size = os.fstat(fd).st_size
+        if size == 0 or _read_at(fd, 1, size - 1) == b"\n":
+            return
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            block = _read_at(fd, end - start, start)
+            index = block.rfind(b"\n")
+            if index != -1:
+                os.ftruncate(fd, start + index + 1)
+                return
+            end = start
+        os.ftruncate(fd, 0)
@@ -0,0 +1,250 @@
+# inference_export.py
+#
+# Exports the TensorFlow models of a trained archive (DIETClassifier,
+# ResponseSelector, TEDPolicy, UnexpecTEDIntentPolicy) as inference-only
+# graphs, and swaps them into a loaded agent:
+#   frozen  - the prediction function with every variable folded into a
+#             constant, as a GraphDef
+#   int8    - the frozen function converted to TensorFlow Lite with int8
+#             dynamic-range quantization of the weights
+# Exports go next to the archive, in models/<archive name>.inference/.
+#
+#   python inference_export.py [models/<archive>.tar.gz] [--samples 50]
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_MODES = ("eager", "frozen", "int8")
+MANIFEST = "manifest.json"
+
+
+def export_dir(model_path):
+    name = os.path.basename(model_path)
+    if name.endswith(".tar.gz"):
+        name = name[:-len(".tar.gz")]
+    return os.path.join(os.path.dirname(model_path), f"{name}.inference")
+
+
+def tensorflow_models(agent):
+    """Yield (graph node name, RasaModel) for every TF model in the agent's graph."""
+    from rasa.utils.tensorflow.models import RasaModel
+
+    for name, node in agent.processor.graph_runner._instantiated_nodes.items():
+        model = getattr(getattr(node, "_component", None), "model", None)
+        if isinstance(model, RasaModel):
+            yield name, model
+
+
+def capture_batches(agent, utterances, turns):
+    """Run warm-up traffic and return {node name: first input batch of its model}."""
+    from startup import warm_up
+
+    batches = {}
+    models = dict(tensorflow_models(agent))
+    for name, model in models.items():
+        def capture(batch_in, name=name, original=model._rasa_predict):
+            batches.setdefault(name, batch_in)
+            return original(batch_in)
+        model._rasa_predict = capture
+    try:
+        asyncio.run(warm_up(agent, utterances, turns))
+    finally:
+        for model in models.values():
+            del model._rasa_predict
+    return batches
+
+
+def input_specs(batch):
+    """TensorSpecs for the present entries of a batch: every dimension but the feature one is dynamic."""
+    import numpy as np
+    import tensorflow as tf
+
+    present, specs = [], []
+    for i, value in enumerate(batch):
+        if value is None:
+            continue
+        value = np.asarray(value)
+        shape = [None] * value.ndim
+        if value.ndim >= 2:
+            shape[-1] = value.shape[-1]
+        present.append(i)
+        specs.append(tf.TensorSpec(shape, tf.as_dtype(value.dtype), name=f"input_{i:03d}"))
+    return present, specs
+
+
+def export_model(model, batch, directory, name, quantize=True):
+    """Write <name>.pb (and <name>.tflite) for `model`; return its manifest entry."""
+    import tensorflow as tf
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
+
+    present, specs = input_specs(batch)
+    paths = []
+
+    def predict(*tensors):
+        batch_in = [None] * len(batch)
+        for i, tensor in zip(present, tensors):
+            batch_in[i] = tensor
+        flat = tf.nest.flatten_with_joined_string_paths(model.batch_predict(tuple(batch_in)))
+        paths[:] = [path for path, _ in flat]
+        return {f"output_{j:03d}": tensor for j, (_, tensor) in enumerate(flat)}
+
+    concrete = tf.function(predict).get_concrete_function(*specs)
+    frozen = convert_variables_to_constants_v2(concrete)
+    tf.io.write_graph(frozen.graph.as_graph_def(), directory, f"{name}.pb", as_text=False)
+    entry = {
+        "arity": len(batch),
+        "present": present,
+        "paths": list(paths),
+        "inputs": [tensor.name for tensor in frozen.inputs],
+        "outputs": [tensor.name for tensor in frozen.outputs],
+    }
+
+    if quantize:
+        converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        # Sparse feature ops have no TFLite builtin; they run as TF ops
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+        with open(os.path.join(directory, f"{name}.tflite"), "wb") as f:
+            f.write(converter.convert())
+        entry["tflite"] = f"{name}.tflite"
+    return entry
+
+
+def export(model_path, samples=50, turns=10, quantize=True):
+    """Export every TF model of the archive at `model_path`; return the export directory."""
+    from startup import import_rasa, load_agent
+    from action_executor import InProcessActionEndpoint
+    from nlu_data import sample_utterances
+
+    Agent = import_rasa()
+    agent = load_agent(Agent, model_path, {}, action_endpoint=InProcessActionEndpoint())
+    batches = capture_batches(agent, sample_utterances(samples), turns)
+
+    directory = export_dir(model_path)
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"model": os.path.basename(model_path), "models": {}}
+    for name, model in tensorflow_models(agent):
+        if name not in batches:
+            logger.warning(f"{name} made no prediction during export, it stays eager")
+            continue
+        start = time.perf_counter()
+        manifest["models"][name] = export_model(model, batches[name], directory, name, quantize)
+        print(f"Exported {name} in {time.perf_counter() - start:.1f}s")
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return directory
+
+
+def unflatten(paths, values):
+    """Rebuild the nested output dict of batch_predict from its flattened paths."""
+    outputs = {}
+    for path, value in zip(paths, values):
+        *parents, key = path.split("/")
+        node = outputs
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = value
+    return outputs
+
+
+def frozen_runner(directory, name, entry):
+    import tensorflow as tf
+
+    graph_def = tf.compat.v1.GraphDef()
+    with open(os.path.join(directory, f"{name}.pb"), "rb") as f:
+        graph_def.ParseFromString(f.read())
+    wrapped = tf.compat.v1.wrap_function(lambda: tf.compat.v1.import_graph_def(graph_def, name=""), [])
+    graph = wrapped.graph
+    function = wrapped.prune(
+        [graph.as_graph_element(tensor) for tensor in entry["inputs"]],
+        [graph.as_graph_element(tensor) for tensor in entry["outputs"]],
+    )
+
+    def run(inputs):
+        return [output.numpy() for output in function(*(tf.constant(value) for value in inputs))]
+    return run
+
+
+def tflite_runner(directory, name, entry, num_threads=None):
+    import tensorflow as tf
+
+    interpreter = tf.lite.Interpreter(
+        model_path=os.path.join(directory, entry["tflite"]), num_threads=num_threads)
+    runner = interpreter.get_signature_runner()
+    # An interpreter runs one call at a time
+    lock = threading.Lock()
+
+    def run(inputs):
+        kwargs = {f"input_{i:03d}": value for i, value in zip(entry["present"], inputs)}
+        with lock:
+            outputs = runner(**kwargs)
+        return [outputs[key] for key in sorted(outputs)]
+    return run
+
+
+def install_exported(agent, model_path, mode):
+    """Serve the TF models of `agent` from the exports of `model_path` in `mode`.
+
+    Returns the names of the models switched over. Models without an export,
+    or an int8 export, keep running eagerly.
+    """
+    import numpy as np
+    import thread_budget
+
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown inference mode '{mode}', use one of {', '.join(INFERENCE_MODES)}")
+    if mode == "eager":
+        return []
+    directory = export_dir(model_path)
+    try:
+        with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except OSError:
+        logger.warning(f"No inference export in {directory}, serving eagerly; "
+                       f"run `python inference_export.py {model_path}`")
+        return []
+
+    installed = []
+    for name, model in tensorflow_models(agent):
+        entry = manifest["models"].get(name)
+        if entry is None or (mode == "int8" and "tflite" not in entry):
+            continue
+        if mode == "int8":
+            run = tflite_runner(directory, name, entry, thread_budget.current().get("intra_op"))
+        else:
+            run = frozen_runner(directory, name, entry)
+
+        def _rasa_predict(batch_in, entry=entry, run=run, original=model._rasa_predict):
+            if len(batch_in) != entry["arity"] or [i for i, v in enumerate(batch_in) if v is not None] != entry["present"]:
+                return original(batch_in)
+            return unflatten(entry["paths"], run([np.asarray(batch_in[i]) for i in entry["present"]]))
+
+        model._rasa_predict = _rasa_predict
+        installed.append(name)
+    logger.info(f"Serving {', '.join(installed) or 'no models'} in {mode} mode from {directory}")
+    return installed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model", nargs="?", help="model archive, default: the newest in models/")
+    parser.add_argument("--samples", type=int, default=50, help="utterances parsed to trace the models")
+    parser.add_argument("--turns", type=int, default=10, help="dialogue turns run to trace the policies")
+    parser.add_argument("--no-int8", action="store_true", help="skip the TFLite int8 export")
+    args = parser.parse_args()
+
+    from model_manager import ModelManager
+    model_path = args.model or ModelManager().latest_model()
+    directory = export(model_path, args.samples, args.turns, quantize=not args.no_int8)
+    print(f"Inference export written to {directory}")
+
+
+if __name__ == '__main__':
+    main()
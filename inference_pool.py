@@ -0,0 +1,332 @@
+# inference_pool.py
+#
+# Where NLU parsing and policy prediction run:
+#   loop     - in the event loop's thread, as Rasa does by default
+#   thread   - on a pool of threads sharing the loaded agent; TensorFlow and
+#              spaCy release the GIL while they compute
+#   process  - on pre-forked worker processes, each loading its own copy of
+#              every activated model; trackers are sent over as event lists
+# Tracker stores, lock stores, action calls and everything else of a turn
+# stay on the event loop, which only awaits the results.
+
+import asyncio
+import concurrent.futures
+import contextvars
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import logging
+
+import metrics
+from nlu_batcher import parse_batch
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_EXECUTORS = ("loop", "thread", "process")
+
+
+class InferencePool:
+    """Runs the CPU-bound steps of a turn off the event loop.
+
+    `install(agent, model_path)` replaces the agent processor's prediction
+    loop with one that awaits each policy prediction on the pool. Call it
+    for every activated model; in process mode it also loads the model in
+    every worker, which keeps answering turns for its other models
+    meanwhile. `parse(agent, text)` runs the NLU graph on the pool, or
+    inline for agents that are not installed (yet).
+
+    Process workers are forked by `start()`, which must run before
+    TensorFlow is imported in this process: TF's thread pools do not
+    survive a fork. Where fork() is not available (Windows) process mode
+    falls back to threads. Each worker keeps up to `max_models` models, as
+    many as the server keeps resident.
+    """
+
+    def __init__(self, mode="loop", workers=4, max_models=2):
+        if mode not in INFERENCE_EXECUTORS:
+            raise ValueError(f"Unknown inference executor '{mode}', use one of {', '.join(INFERENCE_EXECUTORS)}")
+        if mode == "process" and "fork" not in multiprocessing.get_all_start_methods():
+            logger.error("INFERENCE_EXECUTOR=process needs fork(), which this platform does not have; "
+                         "running inference on threads instead")
+            mode = "thread"
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_models = max(1, max_models)
+        self.parses = 0
+        self.predictions = 0
+        self.wait_seconds = 0.0
+        self._threads = None
+        self._pid = None
+        self._processes = []
+        self._idle = queue.Queue()
+
+    @property
+    def enabled(self):
+        return self.mode != "loop"
+
+    def start(self):
+        if self.mode != "process" or self._processes:
+            return
+        context = multiprocessing.get_context("fork")
+        for _ in range(self.workers):
+            worker = WorkerProcess(context, self.max_models)
+            self._processes.append(worker)
+            self._idle.put(worker)
+        self._pid = os.getpid()
+        logger.info(f"Started {self.workers} inference worker processes")
+
+    def _executor(self):
+        # Process mode uses the threads only to wait on the workers' pipes
+        if self._threads is None or self._pid != os.getpid():
+            if self.mode == "process" and self._pid != os.getpid():
+                raise RuntimeError("Inference worker processes belong to the process that started them")
+            self._threads = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference")
+            self._pid = os.getpid()
+        return self._threads
+
+    def install(self, agent, model_path=None):
+        if not self.enabled or getattr(agent.processor, "_inference_pool", None) is self:
+            return
+        if self.mode == "process":
+            start = time.perf_counter()
+            # Workers load in a background thread and keep answering turns
+            # for the models they already have; the status calls below only
+            # hold a worker's pipe for a moment
+            for worker in self._processes:
+                worker.call("load", model_path)
+            for worker in self._processes:
+                while not worker.call("loaded", model_path):
+                    time.sleep(0.1)
+            logger.info(f"Loaded {model_path} in {len(self._processes)} inference workers "
+                        f"in {time.perf_counter() - start:.1f}s")
+        install_prediction_loop(agent, self)
+        agent.processor._inference_model_path = model_path
+        agent.processor._inference_pool = self
+
+    def _call_worker(self, *request):
+        worker = self._idle.get()
+        try:
+            return worker.call(*request)
+        finally:
+            self._idle.put(worker)
+
+    async def _submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        # The current turn is carried over to the worker thread for metrics
+        result = await loop.run_in_executor(self._executor(), contextvars.copy_context().run, fn, *args)
+        self.wait_seconds += time.perf_counter() - start
+        return result
+
+    async def parse(self, agent, text):
+        """Parse data for `text`, computed on the pool."""
+        from rasa.shared.constants import INTENT_MESSAGE_PREFIX
+
+        processor = agent.processor
+        # "/intent{...}" messages skip the NLU graph anyway
+        if getattr(processor, "_inference_pool", None) is not self or text.startswith(INTENT_MESSAGE_PREFIX):
+            return await agent.parse_message(text)
+        self.parses += 1
+        if self.mode == "thread":
+            return (await self._submit(parse_batch, agent, [text]))[0]
+        return await self._submit(self._call_worker, "parse", processor._inference_model_path, text)
+
+    async def predict(self, agent, tracker):
+        """(action, prediction) for `tracker`, computed on the pool."""
+        self.predictions += 1
+        processor = agent.processor
+        if self.mode == "thread":
+            return await self._submit(processor.predict_next_with_tracker_if_should, tracker)
+
+        from rasa.core.actions.action import action_for_name_or_text
+        from rasa.shared.core.trackers import EventVerbosity
+
+        events = tracker.current_state(EventVerbosity.ALL)["events"]
+        name, prediction, seconds = await self._submit(
+            self._call_worker, "predict", processor._inference_model_path, tracker.sender_id, events)
+        metrics.record_prediction(tracker, name, prediction.max_confidence, seconds)
+        return action_for_name_or_text(name, processor.domain, processor.action_endpoint), prediction
+
+    def stats(self):
+        calls = self.parses + self.predictions
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self.enabled else 0,
+            "parses": self.parses,
+            "predictions": self.predictions,
+            "mean_wait_ms": round(self.wait_seconds / calls * 1000, 2) if calls else 0.0,
+        }
+
+
+def install_prediction_loop(agent, pool):
+    """Swap MessageProcessor._run_prediction_loop for one that awaits `pool.predict`.
+
+    Same steps as Rasa 3.6's loop: predict, re-run action_extract_slots
+    after an end-to-end prediction, run the action, and repeat until the
+    action asks to listen or the circuit breaker trips.
+    """
+    from rasa.core.processor import ActionLimitReached
+    from rasa.shared.core.constants import ACTION_EXTRACT_SLOTS
+
+    processor = agent.processor
+
+    async def _run_prediction_loop(output_channel, tracker):
+        should_predict_another_action = True
+        while should_predict_another_action and processor._should_handle_message(tracker):
+            try:
+                action, prediction = await pool.predict(agent, tracker)
+            except ActionLimitReached:
+                logger.warning(f"Circuit breaker tripped. Stopped predicting more actions "
+                               f"for sender '{tracker.sender_id}'.")
+                if processor.on_circuit_break:
+                    processor.on_circuit_break(tracker, output_channel, processor.nlg)
+                break
+
+            if prediction.is_end_to_end_prediction:
+                logger.debug(f"An end-to-end prediction was made which has triggered the 2nd execution "
+                             f"of the default action '{ACTION_EXTRACT_SLOTS}'.")
+                tracker = await processor.run_action_extract_slots(output_channel, tracker)
+
+            should_predict_another_action = await processor._run_action(
+                action, tracker, output_channel, processor.nlg, prediction)
+
+    processor._run_prediction_loop = _run_prediction_loop
+
+
+class WorkerProcess:
+    """A forked process answering load/parse/predict requests over a pipe, one at a time."""
+
+    def __init__(self, context, max_models):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, max_models),
+                                       name="inference-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._lock = threading.Lock()
+
+    def call(self, *request):
+        with self._lock:
+            self.conn.send(request)
+            ok, result = self.conn.recv()
+        if not ok:
+            raise result
+        return result
+
+
+# Worker process side: the agents loaded in this worker, by archive path,
+# the threads still loading one and the errors of failed background loads.
+# _worker_lock only guards these dicts, never a load.
+_worker_agents = {}
+_worker_loaders = {}
+_worker_errors = {}
+_worker_lock = threading.Lock()
+
+# A worker keeps as many models as the server keeps resident (set by
+# _worker_main), so it does not drop one the server still routes turns to
+_max_worker_models = 2
+
+
+def _worker_main(conn, max_models):
+    global _max_worker_models
+    _max_worker_models = max_models
+    handlers = {"load": _worker_preload, "loaded": _worker_loaded, "parse": _worker_parse,
+                "predict": _worker_predict}
+    while True:
+        try:
+            command, *args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, handlers[command](*args)))
+        except Exception as e:
+            try:
+                conn.send((False, e))
+            except Exception:
+                conn.send((False, RuntimeError(repr(e))))
+
+
+def _worker_build(model_path):
+    from startup import import_rasa, load_agent
+    Agent = import_rasa()
+    agent = load_agent(Agent, model_path, {})
+    # Same TF graphs as the serving process, see inference_export.py
+    mode = os.environ.get("INFERENCE_MODE", "eager")
+    if mode != "eager":
+        from inference_export import install_exported
+        install_exported(agent, model_path, mode)
+    return agent
+
+
+def _worker_store(model_path, agent):
+    with _worker_lock:
+        _worker_agents[model_path] = agent
+        while len(_worker_agents) > _max_worker_models:
+            del _worker_agents[next(iter(_worker_agents))]
+
+
+def _worker_load(model_path):
+    """The agent for `model_path`, loaded in the calling thread unless a background load is running."""
+    with _worker_lock:
+        agent = _worker_agents.get(model_path)
+        loader = _worker_loaders.get(model_path)
+    if agent is not None:
+        return agent
+    if loader is not None:
+        loader.join()
+        with _worker_lock:
+            agent = _worker_agents.get(model_path)
+        if agent is not None:
+            return agent
+    agent = _worker_build(model_path)
+    _worker_store(model_path, agent)
+    return agent
+
+
+def _worker_preload(model_path):
+    """Start loading `model_path` in a background thread and return at once."""
+    with _worker_lock:
+        if model_path in _worker_agents or model_path in _worker_loaders:
+            return
+        _worker_errors.pop(model_path, None)
+        loader = _worker_loaders[model_path] = threading.Thread(
+            target=_worker_background_load, args=(model_path,), name="model-loader", daemon=True)
+    loader.start()
+
+
+def _worker_background_load(model_path):
+    try:
+        _worker_store(model_path, _worker_build(model_path))
+    except Exception as e:
+        with _worker_lock:
+            _worker_errors[model_path] = e
+    finally:
+        with _worker_lock:
+            del _worker_loaders[model_path]
+
+
+def _worker_loaded(model_path):
+    """False while `model_path` is loading; raises the error of a failed load."""
+    with _worker_lock:
+        if model_path in _worker_loaders:
+            return False
+        error = _worker_errors.pop(model_path, None)
+    if error is not None:
+        raise error
+    return True
+
+
+def _worker_parse(model_path, text):
+    return parse_batch(_worker_load(model_path), [text])[0]
+
+
+def _worker_predict(model_path, sender_id, events):
+    from rasa.shared.core.trackers import DialogueStateTracker
+
+    agent = _worker_load(model_path)
+    tracker = DialogueStateTracker.from_dict(sender_id, events, agent.domain.slots)
+    start = time.perf_counter()
+    action, prediction = agent.processor.predict_next_with_tracker_if_should(tracker)
+    return action.name(), prediction, time.perf_counter() - start
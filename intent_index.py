@@ -0,0 +1,160 @@
+# intent_index.py
+
+import math
+import re
+import time
+import weakref
+from collections import Counter
+
+from nlu_data import NLU_DATA_PATH, load_nlu_examples
+from response_cache import normalize_text
+
+# Examples with inline entity annotations, e.g. [ccs](college); their
+# entities come from DIET, so they are left out of the index
+_ANNOTATION = re.compile(r"\]\s*[({]")
+
+EXACT_CONFIDENCE = 1.0
+REORDERED_CONFIDENCE = 0.95
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class IntentIndex:
+    """Maps verbatim and near-verbatim training examples to their intent.
+
+    Three lookups, cheapest first:
+      exact      normalized text equals a training example
+      reordered  same words as an example in a different order
+      similar    character-trigram Jaccard similarity to the closest
+                 example of at least `threshold`, and no example of another
+                 intent within `margin` of it
+
+    Texts that occur under more than one intent are not indexed. A hit
+    returns parse data with the similarity as confidence. Messages that
+    miss go through the full NLU pipeline.
+    """
+
+    def __init__(self, examples, threshold=0.9, margin=0.05, agent=None):
+        self.threshold = threshold
+        self.margin = margin
+        self._agent = weakref.ref(agent) if agent is not None else None
+
+        exact = {}
+        for intent, text in examples:
+            key = normalize_text(text)
+            if key:
+                exact.setdefault(key, set()).add(intent)
+        self.exact = {key: intents.pop() for key, intents in exact.items() if len(intents) == 1}
+
+        bags = {}
+        for key, intent in self.exact.items():
+            bags.setdefault(" ".join(sorted(key.split())), set()).add(intent)
+        self.bags = {bag: intents.pop() for bag, intents in bags.items() if len(intents) == 1}
+
+        self._texts = list(self.exact)
+        self._intents = [self.exact[key] for key in self._texts]
+        self._grams = [trigrams(key) for key in self._texts]
+        self._postings = {}
+        for i, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+        self.lookups = 0
+        self.hits = Counter()
+        self.lookup_seconds = 0.0
+
+    @classmethod
+    def from_nlu_file(cls, path=NLU_DATA_PATH, intents=None, **kwargs):
+        """Index the examples in `path`, keeping only `intents` if given."""
+        examples = [
+            (intent, text) for intent, text in load_nlu_examples(path)
+            if not _ANNOTATION.search(text) and (intents is None or intent in intents)
+        ]
+        return cls(examples, **kwargs)
+
+    def serves(self, agent):
+        """Whether this index was built for `agent`'s domain."""
+        return self._agent is None or self._agent() is agent
+
+    def lookup(self, text):
+        """Return (intent, confidence, kind) or None."""
+        key = normalize_text(text)
+        if not key:
+            return None
+        intent = self.exact.get(key)
+        if intent is not None:
+            return intent, EXACT_CONFIDENCE, "exact"
+        intent = self.bags.get(" ".join(sorted(key.split())))
+        if intent is not None:
+            return intent, REORDERED_CONFIDENCE, "reordered"
+        return self._most_similar(key)
+
+    def _most_similar(self, key):
+        # Prefix filtering: an example with Jaccard similarity >= threshold
+        # must share one of the message's rarest len - ceil(t * len) + 1
+        # trigrams, so only those posting lists are read
+        grams = trigrams(key)
+        ordered = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+        prefix = len(grams) - math.ceil(self.threshold * len(grams)) + 1
+        candidates = set()
+        for gram in ordered[:prefix]:
+            candidates.update(self._postings.get(gram, ()))
+
+        min_size = self.threshold * len(grams)
+        max_size = len(grams) / self.threshold
+        best = {}
+        for i in candidates:
+            other = self._grams[i]
+            if not min_size <= len(other) <= max_size:
+                continue
+            count = len(grams & other)
+            score = count / (len(grams) + len(other) - count)
+            intent = self._intents[i]
+            if score > best.get(intent, 0.0):
+                best[intent] = score
+        if not best:
+            return None
+
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        intent, score = ranked[0]
+        if score < self.threshold:
+            return None
+        if len(ranked) > 1 and score - ranked[1][1] < self.margin:
+            return None
+        return intent, round(score, 4), "similar"
+
+    def parse_data(self, text):
+        """Parse data for `text` like the NLU pipeline returns it, or None on a miss."""
+        start = time.perf_counter()
+        found = self.lookup(text)
+        self.lookup_seconds += time.perf_counter() - start
+        self.lookups += 1
+        if found is None:
+            self.hits["miss"] += 1
+            return None
+
+        intent, confidence, kind = found
+        self.hits[kind] += 1
+        ranked = {"name": intent, "confidence": confidence}
+        return {
+            "text": text,
+            "intent": ranked,
+            "entities": [],
+            "intent_ranking": [dict(ranked)],
+            "intent_index": kind,
+        }
+
+    def stats(self):
+        hits = self.lookups - self.hits["miss"]
+        return {
+            "examples": len(self.exact),
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": {kind: self.hits[kind] for kind in ("exact", "reordered", "similar")},
+            "misses": self.hits["miss"],
+            "hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0,
+            "mean_lookup_us": round(self.lookup_seconds / self.lookups * 1e6, 1) if self.lookups else 0.0,
+        }
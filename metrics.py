@@ -0,0 +1,260 @@
+# metrics.py
+#
+# Counters and histograms rendered in the Prometheus text format for GET
+# /metrics, plus per-turn stage timing. Recording a value is a dict lookup
+# and a few additions under a lock, cheap enough to leave on in production.
+
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+
+# Seconds; turns range from sub-millisecond cache hits to multi-second
+# action calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_label_text(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then sum
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                labels = _label_text(self.labels, label_values, [("le", bound)])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Value read from `fn()` at scrape time; fn returns a number or {label value: number}.
+
+    With kind="counter" it exposes a total that only goes up, kept elsewhere.
+    """
+
+    def __init__(self, name, help, fn, label=None, kind="gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.label = label
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.fn()
+        if isinstance(value, dict):
+            for label_value, number in sorted(value.items()):
+                lines.append(f'{self.name}{{{self.label}="{_escape(label_value)}"}} {number}')
+        elif value is not None:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, fn, label=None):
+        return self._add(Gauge(name, help, fn, label))
+
+    def counter_from(self, name, help, fn, label=None):
+        """A counter read from `fn()` at scrape time, for totals other code keeps."""
+        return self._add(Gauge(name, help, fn, label, kind="counter"))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = Registry()
+
+requests_total = registry.counter(
+    "chatbot_requests_total", "Webhook requests by HTTP status.", ["status"])
+request_seconds = registry.histogram(
+    "chatbot_request_seconds", "Webhook request latency, including queueing behind the sender gate.")
+stage_seconds = registry.histogram(
+    "chatbot_turn_stage_seconds",
+    "Time per turn stage: nlu, policy, action, cache, formatting, persistence.", ["stage"])
+intents_total = registry.counter(
+    "chatbot_intents_total", "Predicted intents by source (diet, index, cache).", ["intent", "source"])
+intent_confidence = registry.histogram(
+    "chatbot_intent_confidence", "Confidence of predicted intents.", ["source"], CONFIDENCE_BUCKETS)
+actions_total = registry.counter(
+    "chatbot_actions_total", "Actions predicted by the policies.", ["action"])
+action_confidence = registry.histogram(
+    "chatbot_action_confidence", "Confidence of predicted actions, action_listen excluded.",
+    buckets=CONFIDENCE_BUCKETS)
+
+
+class Turn:
+    """What one turn predicted, and how long each of its stages took."""
+
+    __slots__ = ("stages", "intent", "intent_confidence", "actions")
+
+    def __init__(self):
+        self.stages = {}
+        self.intent = None
+        self.intent_confidence = None
+        self.actions = []
+
+    def predicted_action(self):
+        """First action predicted after the user message, with its confidence."""
+        for name, confidence in self.actions:
+            if name != "action_listen":
+                return name, confidence
+        return ("action_listen", self.actions[0][1]) if self.actions else (None, None)
+
+
+_current_turn = contextvars.ContextVar("current_turn", default=None)
+
+
+@contextlib.contextmanager
+def turn():
+    """Collect the stages of the turn running in this task; they are recorded on exit."""
+    current = Turn()
+    token = _current_turn.set(current)
+    try:
+        yield current
+    finally:
+        _current_turn.reset(token)
+        for stage, seconds in current.stages.items():
+            stage_seconds.observe(seconds, stage)
+
+
+def current_turn():
+    return _current_turn.get()
+
+
+def add_stage(stage, seconds):
+    current = _current_turn.get()
+    if current is not None:
+        current.stages[stage] = current.stages.get(stage, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage(name, time.perf_counter() - start)
+
+
+def record_intent(intent, confidence, source):
+    current = _current_turn.get()
+    if current is not None:
+        current.intent = intent
+        current.intent_confidence = confidence
+    intents_total.inc(intent or "none", source)
+    if confidence is not None:
+        intent_confidence.observe(confidence, source)
+
+
+def record_prediction(tracker, name, confidence, seconds):
+    """Record one policy prediction for `tracker` and the current turn."""
+    add_stage("policy", seconds)
+    actions_total.inc(name)
+    if confidence is not None and name != "action_listen":
+        action_confidence.observe(confidence)
+    current = _current_turn.get()
+    if current is not None:
+        # The intent as the tracker holds it, retrieval intents resolved
+        intent = tracker.latest_message.intent if tracker.latest_message else {}
+        if intent.get("name"):
+            current.intent = intent.get("name")
+            current.intent_confidence = intent.get("confidence")
+        current.actions.append((name, confidence))
+
+
+def instrument_agent(agent):
+    """Time policy prediction and record the predicted actions of `agent`.
+
+    Wraps MessageProcessor.predict_next_with_tracker_if_should on this
+    agent's processor only. The current turn takes its intent from the
+    tracker passed in, which by then holds the parsed user message, and
+    collects every action predicted for it.
+    """
+    processor = agent.processor
+    original = getattr(processor, "predict_next_with_tracker_if_should", None)
+    if original is None or getattr(original, "_instrumented", False):
+        return
+
+    def predict_next_with_tracker_if_should(tracker):
+        start = time.perf_counter()
+        action, prediction = original(tracker)
+        record_prediction(tracker, action.name(), getattr(prediction, "max_confidence", None),
+                          time.perf_counter() - start)
+        return action, prediction
+
+    predict_next_with_tracker_if_should._instrumented = True
+    processor.predict_next_with_tracker_if_should = predict_next_with_tracker_if_should
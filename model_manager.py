@@ -0,0 +1,253 @@
+# model_manager.py
+
+import asyncio
+import contextlib
+import glob
+import os
+import queue
+import threading
+import time
+import logging
+
+from nlu_data import sample_utterances
+from startup import load_agent, warm_up
+
+logger = logging.getLogger(__name__)
+
+
+class LoadedModel:
+    """An Agent loaded from one archive, plus the number of turns using it."""
+
+    __slots__ = ("path", "agent", "loaded_at", "timings", "in_flight")
+
+    def __init__(self, path, agent, timings):
+        self.path = path
+        self.agent = agent
+        self.loaded_at = time.time()
+        self.timings = timings
+        self.in_flight = 0
+
+
+class ModelManager:
+    """Keeps the serving Agent up to date with the archives in `models_dir`.
+
+    A background thread polls the directory. When a newer archive appears
+    (and its size has stopped changing), it is loaded and warmed up off the
+    request path and then swapped in with a single reference assignment.
+    Turns already running keep the agent they started with. All agents share
+    one tracker store and lock store, so conversations carry over the swap.
+
+    At most `max_resident` agents stay in memory. The oldest inactive one is
+    dropped once no turn is using it. An admin can pin a specific archive,
+    which stops automatic switching, roll back to the previously active one,
+    or unpin to follow the newest archive again.
+    """
+
+    def __init__(self, models_dir="models", max_resident=2, poll_interval=10.0,
+                 warmup_samples=20, warmup_turns=5, action_executor="http",
+                 endpoints="endpoints.yml", inference_mode="eager"):
+        self.models_dir = models_dir
+        self.max_resident = max(1, max_resident)
+        self.poll_interval = poll_interval
+        self.warmup_samples = warmup_samples
+        self.warmup_turns = warmup_turns
+        self.action_executor = action_executor
+        self.endpoints = endpoints
+        self.inference_mode = inference_mode
+        self._action_endpoint = None
+        self.active = None
+        self.pinned = False
+        self.loading = None
+        self.last_error = None
+        self.swaps = 0
+        self._resident = []
+        self._history = []
+        self._lock = threading.Lock()
+        self._commands = queue.Queue()
+        self._thread = None
+        self._pending_sizes = {}
+        self._failed = {}
+        self._swap_callbacks = []
+
+    def latest_model(self):
+        if not os.path.exists(self.models_dir):
+            os.makedirs(self.models_dir)
+            raise FileNotFoundError(f"Created new models directory at {self.models_dir}")
+
+        model_files = glob.glob(os.path.join(self.models_dir, '*.tar.gz'))
+        if not model_files:
+            raise FileNotFoundError(f"No model files found in {self.models_dir}")
+
+        return max(model_files, key=os.path.getmtime)
+
+    def load(self, path, timings=None):
+        """Load and warm up the archive at `path`. Runs in the calling thread."""
+        timings = {} if timings is None else timings
+        print(f"Loading model: {path}")
+        self.loading = path
+        try:
+            if self._action_endpoint is None:
+                from action_executor import create_action_endpoint
+                self._action_endpoint = create_action_endpoint(self.action_executor, self.endpoints)
+            kwargs = {"action_endpoint": self._action_endpoint}
+            if self.active is not None:
+                # Share conversation state with the agent being replaced
+                kwargs["tracker_store"] = self.active.agent.tracker_store
+                kwargs["lock_store"] = self.active.agent.lock_store
+            from rasa.core.agent import Agent
+            agent = load_agent(Agent, path, timings, **kwargs)
+            if self.inference_mode != "eager":
+                from inference_export import install_exported
+                install_exported(agent, path, self.inference_mode)
+
+            start = time.perf_counter()
+            asyncio.run(warm_up(agent, sample_utterances(self.warmup_samples), self.warmup_turns))
+            timings["warmup"] = time.perf_counter() - start
+        finally:
+            self.loading = None
+        return LoadedModel(path, agent, timings)
+
+    def activate(self, loaded, remember_previous=True):
+        """Make `loaded` the agent for new turns.
+
+        The model it replaces becomes the rollback target unless
+        `remember_previous` is False (as when rolling back).
+        """
+        with self._lock:
+            previous = self.active
+            if loaded not in self._resident:
+                self._resident.append(loaded)
+            self.active = loaded
+            if previous is not None and previous is not loaded:
+                if remember_previous:
+                    self._history.append(previous.path)
+                self.swaps += 1
+            self._evict()
+        print(f"Serving model: {loaded.path}")
+        for callback in self._swap_callbacks:
+            callback(loaded)
+
+    def on_swap(self, callback):
+        """Call `callback(loaded_model)` whenever a model is activated."""
+        self._swap_callbacks.append(callback)
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """Yield the active agent and keep it resident until the turn is done."""
+        with self._lock:
+            loaded = self.active
+            loaded.in_flight += 1
+        try:
+            yield loaded.agent
+        finally:
+            with self._lock:
+                loaded.in_flight -= 1
+                if loaded is not self.active and loaded.in_flight == 0:
+                    self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock
+        while len(self._resident) > self.max_resident:
+            idle = [m for m in self._resident if m is not self.active and m.in_flight == 0]
+            if not idle:
+                return
+            evicted = idle[0]
+            self._resident.remove(evicted)
+            print(f"Unloaded model: {evicted.path}")
+
+    def start_watching(self):
+        self._thread = threading.Thread(target=self._run, name="model-manager", daemon=True)
+        self._thread.start()
+
+    def pin(self, filename):
+        """Serve `filename` from models_dir and stop following newer archives."""
+        path = os.path.join(self.models_dir, os.path.basename(filename))
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"No model file {filename} in {self.models_dir}")
+        self._commands.put(("pin", path))
+
+    def rollback(self):
+        """Go back to the previously active model and pin it."""
+        with self._lock:
+            if not self._history:
+                raise ValueError("No previous model to roll back to")
+            path = self._history[-1]
+        self._commands.put(("rollback", path))
+
+    def unpin(self):
+        self._commands.put(("unpin", None))
+
+    def _run(self):
+        while True:
+            try:
+                command, path = self._commands.get(timeout=self.poll_interval)
+            except queue.Empty:
+                command, path = "poll", None
+            try:
+                if command == "poll":
+                    if not self.pinned:
+                        self._check_for_new_model()
+                elif command == "unpin":
+                    self.pinned = False
+                    self._check_for_new_model()
+                elif command == "rollback":
+                    with self._lock:
+                        if self._history and self._history[-1] == path:
+                            self._history.pop()
+                    self.pinned = True
+                    self._switch_to(path, remember_previous=False)
+                else:
+                    self.pinned = True
+                    self._switch_to(path)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{command} failed: {e}"
+                logger.exception(f"Model manager {command} failed: {e}")
+
+    def _check_for_new_model(self):
+        try:
+            latest = self.latest_model()
+        except FileNotFoundError:
+            return
+        if self.active is not None and latest == self.active.path:
+            return
+        # Don't retry a broken archive until it is replaced
+        if self._failed.get(latest) == os.path.getmtime(latest):
+            return
+        # Only load archives that have finished copying
+        size = os.path.getsize(latest)
+        if self._pending_sizes.get(latest) != size:
+            self._pending_sizes = {latest: size}
+            return
+        self._pending_sizes = {}
+        try:
+            self._switch_to(latest)
+        except Exception:
+            self._failed[latest] = os.path.getmtime(latest)
+            raise
+
+    def _switch_to(self, path, remember_previous=True):
+        with self._lock:
+            loaded = next((m for m in self._resident if m.path == path), None)
+        if loaded is None:
+            loaded = self.load(path)
+        if loaded is not self.active:
+            self.activate(loaded, remember_previous=remember_previous)
+
+    def status(self):
+        with self._lock:
+            return {
+                "active": self.active.path if self.active else None,
+                "pinned": self.pinned,
+                "loading": self.loading,
+                "resident": [
+                    {"model": m.path, "in_flight": m.in_flight, "loaded_at": m.loaded_at,
+                     "timings": {phase: round(s, 3) for phase, s in m.timings.items()}}
+                    for m in self._resident
+                ],
+                "rollback_to": self._history[-1] if self._history else None,
+                "swaps": self.swaps,
+                "action_executor": self.action_executor,
+                "inference_mode": self.inference_mode,
+                "last_error": self.last_error,
+            }
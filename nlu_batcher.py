@@ -0,0 +1,199 @@
+# nlu_batcher.py
+
+import asyncio
+import concurrent.futures
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NLUBatcher:
+    """Parses messages from concurrent turns together in micro-batches.
+
+    The first message to arrive opens a window of `window` seconds. Every
+    message that arrives before the window closes, or until `max_batch` are
+    waiting, goes through the NLU graph in one run. SpacyNLP pipes the whole
+    batch through spaCy, and with `install_batched_diet()` DIETClassifier
+    runs one forward pass for the batch. Batches run on a worker thread, so
+    the event loop can collect the next one meanwhile. Each parse result goes
+    back to its own turn, and the dialogue step then runs as usual.
+
+    A `window` of 0 turns batching off: every message is parsed alone, as
+    `agent.handle_text` does.
+    """
+
+    def __init__(self, window=0.01, max_batch=32):
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.batches = 0
+        self.messages = 0
+        self.largest_batch = 0
+        self.parse_seconds = 0.0
+        self._pending = []
+        self._timer = None
+        self._executor = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    async def handle_text(self, agent, text, sender_id):
+        """Like `agent.handle_text`, with the NLU step batched."""
+        from rasa.core.channels.channel import UserMessage
+
+        parse_data = await self.parse(agent, text)
+        return await agent.handle_message(UserMessage(text, sender_id=sender_id, parse_data=parse_data))
+
+    async def parse(self, agent, text):
+        """Queue `text` for the next batch and wait for its parse data."""
+        from rasa.shared.constants import INTENT_MESSAGE_PREFIX
+
+        # "/intent{...}" messages skip the NLU graph anyway
+        if not self.enabled or text.startswith(INTENT_MESSAGE_PREFIX):
+            return await agent.parse_message(text)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((agent, text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        # A model swap can leave turns of two agents in one window
+        by_agent = {}
+        for agent, text, future in pending:
+            by_agent.setdefault(id(agent), (agent, []))[1].append((text, future))
+        for agent, items in by_agent.values():
+            asyncio.ensure_future(self._run_batch(agent, items))
+
+    async def _run_batch(self, agent, items):
+        if self._pid != os.getpid():
+            install_batched_diet()
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlu-batch")
+            self._pid = os.getpid()
+
+        texts = [text for text, _ in items]
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(self._executor, parse_batch, agent, texts)
+        except Exception as e:
+            logger.exception(f"Batched NLU failed for {len(texts)} messages: {e}")
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.parse_seconds += time.perf_counter() - start
+        self.batches += 1
+        self.messages += len(texts)
+        self.largest_batch = max(self.largest_batch, len(texts))
+
+        for (_, future), parse_data in zip(items, results):
+            if not future.done():
+                future.set_result(parse_data)
+
+    def stats(self):
+        return {
+            "window_ms": round(self.window * 1000, 1),
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "messages": self.messages,
+            "mean_batch": round(self.messages / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "mean_batch_ms": round(self.parse_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+        }
+
+
+def parse_batch(agent, texts):
+    """Run the NLU graph once over `texts` and return one parse dict per text.
+
+    Gives the same result as `agent.parse_message` for each text.
+    """
+    from rasa.core.channels.channel import UserMessage
+    from rasa.engine.constants import PLACEHOLDER_MESSAGE, PLACEHOLDER_TRACKER
+    from rasa.shared.nlu.constants import (
+        TEXT, INTENT, INTENT_NAME_KEY, PREDICTED_CONFIDENCE_KEY, ENTITIES
+    )
+
+    processor = agent.processor
+    target = processor.model_metadata.nlu_target
+    results = processor.graph_runner.run(
+        inputs={
+            PLACEHOLDER_MESSAGE: [UserMessage(text) for text in texts],
+            PLACEHOLDER_TRACKER: None,
+        },
+        targets=[target],
+    )
+
+    parsed = []
+    for message in results[target]:
+        parse_data = {
+            TEXT: "",
+            INTENT: {INTENT_NAME_KEY: None, PREDICTED_CONFIDENCE_KEY: 0.0},
+            ENTITIES: [],
+        }
+        parse_data.update(message.as_dict(only_output_properties=True))
+        processor._update_full_retrieval_intent(parse_data)
+        parsed.append(parse_data)
+    return parsed
+
+
+_diet_installed = False
+
+def install_batched_diet():
+    """Make DIETClassifier predict a list of messages in one forward pass.
+
+    Stock `DIETClassifier.process` runs the model once per message. The
+    replacement builds one model input for the whole list, runs inference
+    with the batch size set to the list length, and slices the outputs per
+    message. Single messages, and runs that collect diagnostic data, still
+    use the original code.
+    """
+    global _diet_installed
+    if _diet_installed:
+        return
+    from rasa.nlu.classifiers.diet_classifier import DIETClassifier
+    from rasa.utils.tensorflow.constants import INTENT_CLASSIFICATION, ENTITY_RECOGNITION
+    from rasa.shared.nlu.constants import INTENT, ENTITIES
+
+    original_process = DIETClassifier.process
+
+    def process(self, messages):
+        if (len(messages) < 2 or self.model is None
+                or self._execution_context.should_add_diagnostic_data):
+            return original_process(self, messages)
+
+        model_data = self._create_model_data(messages, training=False)
+        if model_data.is_empty():
+            return original_process(self, messages)
+        outputs = self.model.run_inference(model_data, batch_size=len(messages))
+
+        for i, message in enumerate(messages):
+            out = {
+                key: value[i:i + 1] if getattr(value, "shape", None) and value.shape[0] == len(messages) else value
+                for key, value in outputs.items()
+            }
+            if self.component_config[INTENT_CLASSIFICATION]:
+                label, label_ranking = self._predict_label(out)
+                message.set(INTENT, label, add_to_output=True)
+                message.set("intent_ranking", label_ranking, add_to_output=True)
+            if self.component_config[ENTITY_RECOGNITION]:
+                entities = self._predict_entities(out, message)
+                message.set(ENTITIES, entities, add_to_output=True)
+        return messages
+
+    DIETClassifier.process = process
+    _diet_installed = True
@@ -0,0 +1,45 @@
+# nlu_data.py
+
+import random
+
+import yaml
+
+NLU_DATA_PATH = "data/nlu.yml"
+
+
+def load_nlu_examples(path=NLU_DATA_PATH):
+    """Return (intent, text) pairs for every training example in the NLU file."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    examples = []
+    for block in data.get("nlu") or []:
+        intent = block.get("intent")
+        if not intent:
+            continue
+        for line in (block.get("examples") or "").splitlines():
+            line = line.strip()
+            if line.startswith("- "):
+                examples.append((intent, line[2:].strip()))
+    return examples
+
+
+def sample_utterances(count, path=NLU_DATA_PATH, seed=0):
+    """Pick `count` example texts, spread over as many intents as possible."""
+    by_intent = {}
+    for intent, text in load_nlu_examples(path):
+        by_intent.setdefault(intent, []).append(text)
+
+    rng = random.Random(seed)
+    intents = sorted(by_intent)
+    rng.shuffle(intents)
+    samples = []
+    while len(samples) < count and intents:
+        for intent in list(intents):
+            if len(samples) >= count:
+                break
+            texts = by_intent[intent]
+            samples.append(texts.pop(rng.randrange(len(texts))))
+            if not texts:
+                intents.remove(intent)
+    return samples
@@ -0,0 +1,24 @@
+# output_channel.py
+
+from rasa.core.channels.channel import CollectingOutputChannel
+
+
+class StreamingOutputChannel(CollectingOutputChannel):
+    """Collects bot messages like the REST channel and hands each to `on_message` right away.
+
+    The processor sends a message when the action that uttered it has run,
+    so the first message is out while later actions of the turn (action
+    server calls, follow-up questions) are still running.
+    """
+
+    def __init__(self, on_message):
+        super().__init__()
+        self.on_message = on_message
+
+    @classmethod
+    def name(cls):
+        return "stream"
+
+    async def _persist_message(self, message):
+        await super()._persist_message(message)
+        self.on_message(message)
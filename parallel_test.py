@@ -0,0 +1,214 @@
+# parallel_test.py
+#
+# Runs the test stories and the NLU examples through the model on a pool of
+# worker processes. Each worker loads the model once, then takes shards of
+# stories (evaluated like `rasa test core`) and of NLU examples (parsed and
+# compared with their labelled intent) until none are left. The shard
+# results are merged into one report: story and action accuracy with every
+# failed story and where it went wrong, and per-intent precision, recall,
+# F1 and the most frequent confusions.
+#
+#   python parallel_test.py [--model models/<archive>.tar.gz] [--workers 4]
+#                           [--stories tests/test_stories.yml] [--nlu data/nlu.yml] [--out results/parallel_test.json]
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+STORIES_PATH = "tests/test_stories.yml"
+NLU_PATH = "data/nlu.yml"
+NLU_SHARD_SIZE = 50
+
+# Per worker process, set by _worker_init
+_agent = None
+
+
+def load_stories(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    return data.get("version"), [story for story in data.get("stories") or [] if story.get("steps")]
+
+
+def shards(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _worker_init(model_path, workers):
+    global _agent
+    import thread_budget
+    thread_budget.apply(workers=workers)
+
+    from startup import import_rasa, load_agent
+    from action_executor import InProcessActionEndpoint
+
+    Agent = import_rasa()
+    _agent = load_agent(Agent, model_path, {}, action_endpoint=InProcessActionEndpoint())
+
+
+def _worker_stories(version, stories):
+    return asyncio.run(_evaluate_stories(version, stories))
+
+
+async def _evaluate_stories(version, stories):
+    """Evaluate every story on its own, so each result maps back to its name."""
+    # The per-story targets and predictions of `rasa test core` are only
+    # reachable through these helpers
+    from rasa.core.test import _create_data_generator, _collect_story_predictions
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n, story in enumerate(stories):
+            path = os.path.join(directory, f"story_{n}.yml")
+            with open(path, "w", encoding="utf-8") as f:
+                yaml.safe_dump({"version": version or "3.1", "stories": [story]}, f, allow_unicode=True)
+            generator = _create_data_generator(path, _agent, max_stories=None, use_conversation_test_files=False)
+            trackers = generator.generate_story_trackers()
+            evaluation, _, _ = await _collect_story_predictions(trackers, _agent)
+            store = evaluation.evaluation_store
+            results.append({
+                "story": story.get("story"),
+                "failed": bool(evaluation.failed_stories),
+                "action_targets": list(store.action_targets),
+                "action_predictions": list(store.action_predictions),
+                "intent_targets": list(store.intent_targets),
+                "intent_predictions": list(store.intent_predictions),
+            })
+    return results
+
+
+def _worker_nlu(examples):
+    async def parse_all():
+        predictions = []
+        for intent, text in examples:
+            parsed = await _agent.parse_message(text)
+            predicted = parsed.get("intent") or {}
+            predictions.append((intent, predicted.get("name"), predicted.get("confidence"), text))
+        return predictions
+    return asyncio.run(parse_all())
+
+
+def intent_report(pairs):
+    """Per-label precision, recall, F1 and support from (target, predicted) pairs."""
+    confusion = Counter(pairs)
+    targets = Counter(target for target, _ in pairs)
+    predicted = Counter(prediction for _, prediction in pairs)
+    report = {}
+    for label in sorted(set(targets) | set(p for p in predicted if p is not None)):
+        hits = confusion[(label, label)]
+        precision = hits / predicted[label] if predicted[label] else 0.0
+        recall = hits / targets[label] if targets[label] else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        report[label] = {"precision": precision, "recall": recall, "f1-score": f1, "support": targets[label]}
+    return report
+
+
+def merge(story_results, nlu_results, top_confusions=20):
+    """Merge the shard results into one report."""
+    action_pairs, story_failures = [], []
+    for result in story_results:
+        pairs = list(zip(result["action_targets"], result["action_predictions"]))
+        action_pairs.extend(pairs)
+        if result["failed"]:
+            mistakes = [{"step": step, "expected": target, "predicted": prediction}
+                        for step, (target, prediction) in enumerate(pairs) if target != prediction]
+            mistakes += [{"step": step, "expected_intent": target, "predicted_intent": prediction}
+                         for step, (target, prediction)
+                         in enumerate(zip(result["intent_targets"], result["intent_predictions"]))
+                         if target != prediction]
+            story_failures.append({"story": result["story"], "mistakes": mistakes})
+
+    intent_pairs = [(target, prediction) for target, prediction, _, _ in nlu_results]
+    confusions = Counter(pair for pair in intent_pairs if pair[0] != pair[1])
+    stories = len(story_results)
+    return {
+        "stories": {
+            "total": stories,
+            "failed": len(story_failures),
+            "accuracy": (stories - len(story_failures)) / stories if stories else None,
+            "action_accuracy": (sum(t == p for t, p in action_pairs) / len(action_pairs)
+                                if action_pairs else None),
+            "failures": story_failures,
+        },
+        "nlu": {
+            "examples": len(intent_pairs),
+            "accuracy": (sum(t == p for t, p in intent_pairs) / len(intent_pairs) if intent_pairs else None),
+            "intents": intent_report(intent_pairs),
+            "confusions": [{"intent": t, "predicted": p, "count": n} for (t, p), n in confusions.most_common(top_confusions)],
+            "errors": [{"text": text, "intent": t, "predicted": p, "confidence": c}
+                       for t, p, c, text in nlu_results if t != p],
+        },
+    }
+
+
+def run(model_path, workers, stories_path=STORIES_PATH, nlu_path=NLU_PATH, story_shard_size=None):
+    """Evaluate on `workers` processes; returns (report, timings)."""
+    from nlu_data import load_nlu_examples
+
+    version, stories = load_stories(stories_path) if stories_path else (None, [])
+    examples = load_nlu_examples(nlu_path) if nlu_path else []
+    # A few shards per worker keeps them busy when stories differ in length
+    story_shard_size = story_shard_size or max(1, len(stories) // (workers * 4))
+
+    timings = {}
+    start = time.perf_counter()
+    # spawn: every worker starts TensorFlow in a fresh process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_worker_init,
+                             initargs=(model_path, workers)) as pool:
+        story_futures = [pool.submit(_worker_stories, version, shard) for shard in shards(stories, story_shard_size)]
+        nlu_futures = [pool.submit(_worker_nlu, shard) for shard in shards(examples, NLU_SHARD_SIZE)]
+        story_results = [result for future in story_futures for result in future.result()]
+        nlu_results = [result for future in nlu_futures for result in future.result()]
+    timings["wall"] = time.perf_counter() - start
+
+    report = merge(story_results, nlu_results)
+    report["model"] = os.path.basename(model_path)
+    report["workers"] = workers
+    return report, timings
+
+
+def print_report(report, timings, failures=10, confusions=10):
+    stories, nlu = report["stories"], report["nlu"]
+    print(f"Evaluated {report['model']} on {report['workers']} workers in {timings['wall']:.1f}s")
+    if stories["total"]:
+        print(f"Stories: {stories['total'] - stories['failed']}/{stories['total']} passed "
+              f"({stories['accuracy']:.1%}), action accuracy {stories['action_accuracy']:.1%}")
+        for failure in stories["failures"][:failures]:
+            first = failure["mistakes"][0] if failure["mistakes"] else {}
+            print(f"  FAILED {failure['story']}: {first}")
+    if nlu["examples"]:
+        print(f"NLU: {nlu['accuracy']:.1%} of {nlu['examples']} examples get their labelled intent")
+        for confusion in nlu["confusions"][:confusions]:
+            print(f"  {confusion['intent']} -> {confusion['predicted']}: {confusion['count']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", help="model archive, default: the newest in models/")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--stories", default=STORIES_PATH, help="test stories, '' to skip")
+    parser.add_argument("--nlu", default=NLU_PATH, help="NLU examples, '' to skip")
+    parser.add_argument("--out", default="results/parallel_test.json", help="merged report")
+    args = parser.parse_args()
+
+    from model_manager import ModelManager
+    model_path = args.model or ModelManager().latest_model()
+    report, timings = run(model_path, args.workers, args.stories, args.nlu)
+    print_report(report, timings)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Report written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# prefork.py
+#
+# Pre-fork server that preloads imports and spaCy: one master process
+# imports TensorFlow, Rasa and the pipeline's component modules and loads
+# the spaCy language model, then forks N workers that serve asgi.py on one
+# shared listening socket. Only what the master loaded (the imported code
+# and the spaCy model) is shared copy-on-write between the workers.
+#
+# The trained model is not shared. Every worker loads the model archive and
+# builds the TensorFlow components (DIET, TED, UnexpecTED, ResponseSelector)
+# after the fork, so their weights, and most of a worker's RSS and startup
+# time, are paid once per worker. Loading them in the master is not an
+# option: a TF runtime that has run ops before fork() leaves children with
+# thread pools whose threads do not exist, and their first inference blocks
+# forever. TF also copies checkpoint tensors into its own buffers, so an
+# mmap'd checkpoint would not be shared either.
+#
+# Workers share message counts through the SQLite session backend. A worker
+# that exits is replaced. SIGUSR1 (or --report-interval) prints the RSS and
+# PSS of every process, read from /proc/<pid>/smaps_rollup. Needs fork()
+# and SIGUSR1, i.e. Linux or macOS; on Windows run asgi.py instead.
+#
+#   python prefork.py [--workers 4] [--port 5005] [--report-interval 0]
+
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+
+import yaml
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def memory_usage(pid="self"):
+    """{field: bytes} from /proc/<pid>/smaps_rollup, or {} where it is unavailable."""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in SMAPS_FIELDS:
+                    usage[name] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return usage
+
+
+def print_memory_report(master_pid, worker_pids):
+    mb = 1024 * 1024
+    rows = [("master", master_pid)] + [(f"worker {i}", pid) for i, pid in enumerate(worker_pids)]
+    print(f"{'process':<10} {'pid':>7} {'RSS MB':>8} {'PSS MB':>8} {'shared MB':>10} {'private MB':>11}")
+    total_pss = 0
+    for name, pid in rows:
+        usage = memory_usage(pid)
+        if not usage:
+            continue
+        shared = usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0)
+        private = usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0)
+        total_pss += usage.get("Pss", 0)
+        print(f"{name:<10} {pid:>7} {usage.get('Rss', 0) / mb:>8.1f} {usage.get('Pss', 0) / mb:>8.1f} "
+              f"{shared / mb:>10.1f} {private / mb:>11.1f}")
+    print(f"Total PSS: {total_pss / mb:.1f} MB for {len(worker_pids)} workers")
+
+
+def spacy_models(config_path="config.yml"):
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    return [component["model"] for component in config.get("pipeline") or []
+            if component.get("name") == "SpacyNLP" and component.get("model")]
+
+
+def preload(config_path="config.yml"):
+    """Import and load everything that is safe to share across fork()."""
+    start = time.perf_counter()
+    from startup import import_rasa
+    import_rasa()
+    # Registers and imports every component class the default recipe knows
+    importlib.import_module("rasa.engine.recipes.default_components")
+
+    # SpacyNLP calls spacy.load() when the agent is built; the workers get
+    # the language model loaded here instead of a copy of their own
+    import spacy
+    original_load = spacy.load
+    loaded = {}
+
+    def shared_load(name, *args, **kwargs):
+        key = (str(name), repr(args), repr(sorted(kwargs.items())))
+        if key not in loaded:
+            loaded[key] = original_load(name, *args, **kwargs)
+        return loaded[key]
+
+    spacy.load = shared_load
+    for name in spacy_models(config_path):
+        spacy.load(name, disable=["parser"])
+
+    # Objects allocated so far are never collected; a collection in a worker
+    # would otherwise write to every page holding them
+    gc.collect()
+    gc.freeze()
+    print(f"Master preloaded imports and spaCy in {time.perf_counter() - start:.1f}s; "
+          f"every worker loads its own model")
+
+
+def bind(host, port, backlog=1024):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(sock):
+    """Worker: build the agent and serve asgi.py on the inherited socket."""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    from asgi import app
+    app.run(sock=sock, workers=1, access_log=False)
+
+
+def spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            serve(sock)
+        except BaseException as e:
+            print(f"Worker {os.getpid()} failed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("PREFORK_WORKERS", "4")))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--report-interval", type=float, default=float(os.environ.get("PREFORK_REPORT_INTERVAL", "0")),
+                        help="seconds between memory reports, 0 to report on SIGUSR1 only")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork") or not hasattr(signal, "SIGUSR1"):
+        sys.exit("prefork.py needs os.fork() and SIGUSR1, which this platform does not have; "
+                 "run asgi.py (or app.py) instead")
+    if os.environ.get("INFERENCE_EXECUTOR") == "process":
+        sys.exit("INFERENCE_EXECUTOR=process forks from every worker; use 'loop' or 'thread' with prefork.py")
+    # Workers must count messages in one place; forked children inherit this
+    os.environ.setdefault("SESSION_BACKEND", "sqlite")
+    # Splits the cores between the workers, see thread_budget.py
+    os.environ["PREFORK_WORKERS"] = str(args.workers)
+
+    preload()
+    sock = bind(args.host, args.port)
+    workers = [spawn(sock) for _ in range(args.workers)]
+    print(f"Rasa webhook server (prefork) is running on http://localhost:{args.port} "
+          f"with {args.workers} workers")
+
+    master_pid = os.getpid()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: print_memory_report(master_pid, workers))
+
+    next_report = time.monotonic() + args.report_interval
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.5)
+            if args.report_interval and time.monotonic() >= next_report:
+                print_memory_report(master_pid, workers)
+                next_report = time.monotonic() + args.report_interval
+            continue
+        if pid not in workers:
+            continue
+        index = workers.index(pid)
+        if stopping:
+            workers.pop(index)
+        else:
+            print(f"Worker {pid} exited with status {status}, starting a new one")
+            workers[index] = spawn(sock)
+    sock.close()
+
+
+if __name__ == '__main__':
+    main()
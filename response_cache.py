@@ -0,0 +1,210 @@
+# response_cache.py
+
+import fnmatch
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import yaml
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def featurized_slots(domain_path="domain.yml"):
+    """Names of the slots in the domain file that influence the conversation."""
+    with open(domain_path, "r", encoding="utf-8") as f:
+        domain = yaml.safe_load(f) or {}
+    return tuple(
+        name for name, slot in (domain.get("slots") or {}).items()
+        # Rasa's default: every slot type but "any" is featurized
+        if (slot or {}).get("influence_conversation", (slot or {}).get("type") != "any")
+    )
+
+
+def normalize_text(text):
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class CachedTurn:
+    __slots__ = ("responses", "events", "expires_at")
+
+    def __init__(self, responses, events, expires_at):
+        self.responses = responses
+        self.events = events
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """LRU + TTL cache of bot answers for context-free intents.
+
+    Entries are keyed on the normalized message text plus the values of
+    `key_slots`. With `key_slots` None these are the slots that influence the
+    conversation, taken from every loaded model's domain by `use_domain()`:
+    the policies see them, so an answer may depend on them. A turn is stored only if its intent matches
+    `context_free_intents` with at least `min_confidence` and the turn
+    consisted of utter_* actions alone. Along with the responses, the turn's
+    events are kept. On a hit they are replayed into the tracker, so the
+    conversation history the policies see stays the same as if the model
+    had run.
+
+    `clear()` drops everything and bumps the generation, so turns that
+    started before a model reload cannot store stale answers afterwards.
+    """
+
+    def __init__(self, enabled=False, context_free_intents=(), key_slots=None,
+                 max_entries=5000, ttl=3600, min_confidence=0.9, domain_path="domain.yml"):
+        self.enabled = enabled
+        self.context_free_intents = tuple(context_free_intents)
+        self.configured_key_slots = None if key_slots is None else tuple(key_slots)
+        self.key_slots = (self.configured_key_slots if key_slots is not None
+                          else featurized_slots(domain_path))
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_confidence = min_confidence
+        self.generation = 0
+        self._entries = OrderedDict()
+        # clear() is called from the model manager thread
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_config(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        return cls(
+            enabled=bool(config.get("enabled", False)),
+            context_free_intents=config.get("context_free_intents") or (),
+            key_slots=config.get("key_slots"),
+            max_entries=int(config.get("max_entries", 5000)),
+            ttl=float(config.get("ttl", 3600)),
+            min_confidence=float(config.get("min_confidence", 0.9)),
+        )
+
+    def use_domain(self, domain):
+        """Key on the featurized slots of a newly loaded model's domain, unless configured."""
+        if self.configured_key_slots is None:
+            self.key_slots = tuple(slot.name for slot in domain.slots if slot.influence_conversation)
+
+    def is_context_free(self, intent):
+        return any(fnmatch.fnmatchcase(intent, pattern) for pattern in self.context_free_intents)
+
+    async def key_for(self, agent, sender_id, message):
+        slot_values = ()
+        if self.key_slots:
+            tracker = await agent.tracker_store.retrieve(sender_id)
+            slot_values = tuple(
+                tracker.get_slot(slot) if tracker else None for slot in self.key_slots
+            )
+        return self.generation, normalize_text(message), slot_values
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, responses, events):
+        with self._lock:
+            if key[0] != self.generation:
+                return
+            self._entries[key] = CachedTurn(responses, events, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    async def store_turn(self, agent, sender_id, key, responses):
+        """Cache the turn that just ran for `sender_id` if it is context-free."""
+        tracker = await agent.tracker_store.retrieve(sender_id)
+        events = self.cacheable_events(tracker) if tracker else None
+        if events is None:
+            return
+        cached_responses = [
+            {k: v for k, v in response.items() if k != "recipient_id"}
+            for response in responses if isinstance(response, dict)
+        ]
+        self.put(key, cached_responses, events)
+
+    def cacheable_events(self, tracker):
+        """Return the last turn's events as dicts, or None if it must not be cached."""
+        from rasa.shared.core.events import (
+            ActionExecuted, BotUttered, DefinePrevUserUtteredFeaturization, UserUttered,
+        )
+
+        turn = []
+        for event in reversed(tracker.events):
+            turn.append(event)
+            if isinstance(event, UserUttered):
+                break
+        else:
+            return None
+        turn.reverse()
+
+        intent = turn[0].intent or {}
+        if not self.is_context_free(intent.get("name") or ""):
+            return None
+        if (intent.get("confidence") or 0.0) < self.min_confidence:
+            return None
+        for event in turn[1:]:
+            # The policy ensemble logs how the user turn was featurized after
+            # every message; bookkeeping without side effects
+            if isinstance(event, (BotUttered, DefinePrevUserUtteredFeaturization)):
+                continue
+            if isinstance(event, ActionExecuted) and (
+                    event.action_name == "action_listen" or (event.action_name or "").startswith("utter_")):
+                continue
+            return None
+        return [event.as_dict() for event in turn]
+
+    async def replay_turn(self, agent, sender_id, message, events):
+        """Append a cached turn's events to the sender's tracker."""
+        from rasa.shared.core.events import Event
+
+        tracker = await agent.processor.fetch_tracker_and_update_session(sender_id)
+        new_events = []
+        for parameters in events:
+            if parameters.get("event") == "user":
+                parameters = dict(parameters, text=message)
+            new_events.append(Event.from_parameters(parameters))
+        tracker.update_with_events(new_events, agent.domain)
+        await agent.processor.save_tracker(tracker)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,250 @@
+# sessions.py
+
+import abc
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import yaml
+
+
+def session_expiration_seconds(domain_path="domain.yml"):
+    """Read session_config.session_expiration_time (minutes) from the domain.
+
+    Returns None when sessions never expire (Rasa treats 0 that way).
+    """
+    with open(domain_path, "r", encoding="utf-8") as f:
+        domain = yaml.safe_load(f) or {}
+    minutes = (domain.get("session_config") or {}).get("session_expiration_time", 60)
+    if not minutes:
+        return None
+    return float(minutes) * 60
+
+
+class Session:
+    """Compact per-sender record. The transcript itself lives on disk."""
+
+    __slots__ = ("sender_id", "filename", "message_count", "last_seen")
+
+    def __init__(self, sender_id, filename, message_count=0, last_seen=0.0):
+        self.sender_id = sender_id
+        self.filename = filename
+        self.message_count = message_count
+        self.last_seen = last_seen
+
+
+class SessionBackend(abc.ABC):
+    """Where per-sender message counts and chat files are kept.
+
+    `touch()` must count the message and return the updated Session in one
+    atomic step, so the message limit holds however many workers share the
+    backend.
+    """
+
+    @abc.abstractmethod
+    def touch(self, sender_id):
+        """Count a new message from `sender_id`.
+
+        Returns the updated Session and whether it was just created.
+        """
+
+    @abc.abstractmethod
+    def stats(self):
+        """Counters for /stats."""
+
+
+class InMemorySessionStore(SessionBackend):
+    """Bounded sender -> Session map with LRU and TTL eviction, for a single process.
+
+    Sessions idle for longer than `ttl` seconds are dropped, matching the
+    Rasa session expiration, and the least recently used sessions are dropped
+    once more than `max_sessions` are held. A sender coming back after
+    eviction starts a new session with a new chat history file, just like
+    Rasa starts a new conversation session.
+    """
+
+    def __init__(self, allocator, ttl=None, max_sessions=10000):
+        self.allocator = allocator
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.sessions_created = 0
+        self.ttl_evictions = 0
+        self.lru_evictions = 0
+
+    def touch(self, sender_id):
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(sender_id)
+            is_new = session is None
+            if is_new:
+                session = Session(sender_id, self.allocator.allocate())
+                self._sessions[sender_id] = session
+                self.sessions_created += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.lru_evictions += 1
+            else:
+                self._sessions.move_to_end(sender_id)
+            session.message_count += 1
+            session.last_seen = now
+            return session, is_new
+
+    def _evict_expired(self, now):
+        # The dict is kept in last-seen order, so expired sessions sit at the front
+        if self.ttl is None:
+            return
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_seen <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.ttl_evictions += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def memory_bytes(self):
+        """Approximate memory held by the store, in bytes."""
+        with self._lock:
+            total = sys.getsizeof(self._sessions)
+            for session in self._sessions.values():
+                total += sys.getsizeof(session)
+                total += sys.getsizeof(session.sender_id)
+                total += sys.getsizeof(session.filename)
+            return total
+
+    def stats(self):
+        with self._lock:
+            self._evict_expired(time.time())
+            active = len(self._sessions)
+        return {
+            "backend": "memory",
+            "active_sessions": active,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl,
+            "sessions_created": self.sessions_created,
+            "ttl_evictions": self.ttl_evictions,
+            "lru_evictions": self.lru_evictions,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+class SQLiteSessionStore(SessionBackend):
+    """Session store in a SQLite database shared by several worker processes.
+
+    The database runs in WAL mode so readers never block the writer, and
+    every `touch()` runs inside a BEGIN IMMEDIATE transaction, which makes the
+    read-increment-write of the message count atomic across processes.
+    Expired sessions are replaced on their next message and purged in bulk
+    every `purge_interval` seconds.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            sender_id TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            last_seen REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen);
+    """
+
+    def __init__(self, path, allocator, ttl=None, timeout=30.0, purge_interval=60.0):
+        self.path = path
+        self.allocator = allocator
+        self.ttl = ttl
+        self.timeout = timeout
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._last_purge = time.time()
+        self.sessions_created = 0
+        self.ttl_evictions = 0
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
+
+    def _connection(self):
+        # sqlite3 connections must not cross threads or fork()
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def touch(self, sender_id):
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT filename, message_count, last_seen FROM sessions WHERE sender_id = ?",
+                (sender_id,)
+            ).fetchone()
+            is_new = row is None or (self.ttl is not None and now - row[2] > self.ttl)
+            if is_new:
+                if row is not None:
+                    self.ttl_evictions += 1
+                session = Session(sender_id, self.allocator.allocate(), 1, now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (sender_id, filename, message_count, last_seen) "
+                    "VALUES (?, ?, ?, ?)",
+                    (sender_id, session.filename, session.message_count, now)
+                )
+                self.sessions_created += 1
+            else:
+                session = Session(sender_id, row[0], row[1] + 1, now)
+                conn.execute(
+                    "UPDATE sessions SET message_count = ?, last_seen = ? WHERE sender_id = ?",
+                    (session.message_count, now, sender_id)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        if self.ttl is not None and now - self._last_purge > self.purge_interval:
+            self._purge_expired(now)
+        return session, is_new
+
+    def _purge_expired(self, now):
+        self._last_purge = now
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE last_seen < ?", (now - self.ttl,)
+        )
+        self.ttl_evictions += cursor.rowcount
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self):
+        try:
+            db_bytes = os.path.getsize(self.path)
+        except OSError:
+            db_bytes = 0
+        return {
+            "backend": "sqlite",
+            "active_sessions": len(self),
+            "ttl_seconds": self.ttl,
+            # Counted by this worker process only
+            "sessions_created": self.sessions_created,
+            "ttl_evictions": self.ttl_evictions,
+            "db_bytes": db_bytes,
+        }
+
+
+def create_session_store(backend, allocator, ttl=None, max_sessions=10000, db_path="sessions.db"):
+    """Build the session store selected by `backend` ("memory" or "sqlite")."""
+    if backend == "memory":
+        return InMemorySessionStore(allocator, ttl=ttl, max_sessions=max_sessions)
+    if backend == "sqlite":
+        return SQLiteSessionStore(db_path, allocator, ttl=ttl)
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -0,0 +1,147 @@
+# startup.py
+
+import contextlib
+import os
+import threading
+import time
+import logging
+
+import thread_budget
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SENDER_ID = "__warmup__"
+
+
+@contextlib.contextmanager
+def _timed_classmethod(cls, name, timings, phase):
+    """Add the time spent in `cls.name` to timings[phase] while active."""
+    original_descriptor = vars(cls).get(name)
+    original = getattr(cls, name)
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+    setattr(cls, name, staticmethod(timed))
+    try:
+        yield
+    finally:
+        if original_descriptor is not None:
+            setattr(cls, name, original_descriptor)
+        else:
+            delattr(cls, name)
+
+
+class Startup:
+    """Loads the first model in timed phases and warms it up before reporting ready.
+
+    Phases are recorded in `timings` (seconds):
+      imports         - TensorFlow and Rasa imports
+      model_unpack    - extracting the model archive
+      component_load  - building the graph and loading every component
+      warmup          - parsing the warm-up utterances and running turns,
+                        so TensorFlow traces DIET/TED/UnexpecTED graphs now
+                        instead of during the first real request
+
+    Once ready, the model manager takes over and watches for newer models.
+    """
+
+    def __init__(self, model_manager):
+        self.model_manager = model_manager
+        self.timings = {}
+        self.error = None
+        self.phase = "starting"
+        self.ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Run the pipeline in a background thread so the server can bind right away."""
+        self._thread = threading.Thread(target=self._run_safely, name="startup", daemon=True)
+        self._thread.start()
+
+    def _run_safely(self):
+        try:
+            self.run()
+        except Exception as e:
+            self.error = e
+            self.phase = "failed"
+            logger.exception(f"Startup failed: {e}")
+
+    def run(self):
+        """Run every phase in the calling thread."""
+        started = time.perf_counter()
+
+        self.phase = "imports"
+        start = time.perf_counter()
+        import_rasa()
+        self.timings["imports"] = time.perf_counter() - start
+
+        self.phase = "loading"
+        manager = self.model_manager
+        loaded = manager.load(manager.latest_model(), self.timings)
+        manager.activate(loaded)
+
+        self.timings["total"] = time.perf_counter() - started
+        self.phase = "ready"
+        self.ready.set()
+        self.print_report()
+        manager.start_watching()
+
+    def print_report(self):
+        print("Startup timing breakdown:")
+        for phase, seconds in self.timings.items():
+            print(f"  {phase:<15} {seconds:8.2f}s")
+
+    def status(self):
+        active = self.model_manager.active
+        status = {
+            "ready": self.ready.is_set(),
+            "phase": self.phase,
+            "model": active.path if active else self.model_manager.loading,
+            "timings": {phase: round(seconds, 3) for phase, seconds in self.timings.items()},
+        }
+        if self.error is not None:
+            status["error"] = str(self.error)
+        return status
+
+
+def import_rasa():
+    """Import TensorFlow and Rasa, with TF logging silenced and threads budgeted before it loads."""
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    thread_budget.ensure_applied()
+    import tensorflow as tf
+    tf.get_logger().setLevel('ERROR')
+    thread_budget.configure_tensorflow(tf)
+    from rasa.core.agent import Agent
+    return Agent
+
+
+def load_agent(Agent, model_path, timings, **kwargs):
+    """Agent.load() with the archive unpacking timed apart from component loading."""
+    from rasa.engine.storage.local_model_storage import LocalModelStorage
+
+    before = timings.get("model_unpack", 0.0)
+    start = time.perf_counter()
+    with _timed_classmethod(LocalModelStorage, "from_model_archive", timings, "model_unpack"):
+        agent = Agent.load(model_path, **kwargs)
+    unpack = timings.get("model_unpack", 0.0) - before
+    timings["component_load"] = time.perf_counter() - start - unpack
+    print(f"Model loaded successfully: {model_path}")
+    return agent
+
+
+async def warm_up(agent, utterances, turns):
+    """Run NLU on every utterance and full dialogue turns on the first few."""
+    for text in utterances:
+        await agent.parse_message(text)
+    for text in utterances[:turns]:
+        try:
+            await agent.handle_text(text, sender_id=WARMUP_SENDER_ID)
+        except Exception as e:
+            # Custom actions fail if the action server is not up yet; the
+            # policies have still been traced by then
+            logger.warning(f"Warm-up turn '{text}' failed: {e}")
@@ -0,0 +1,12 @@
+# conftest.py
+#
+# Unit tests for the pure-Python modules; they need neither Rasa nor a
+# trained model. Run from the repository root with `python -m pytest`.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Config files (domain.yml, response_cache.yml, ...) are read relative to the root
+os.chdir(ROOT)
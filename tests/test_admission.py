@@ -0,0 +1,78 @@
+import pytest
+
+from admission import Admission, Rejected, _Buckets
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_refills():
+    clock = Clock()
+    buckets = _Buckets(rate=2.0, burst=3, max_keys=10, clock=clock)
+    assert [buckets.take("a") for _ in range(3)] == [0, 0, 0]
+    assert buckets.take("a") == pytest.approx(0.5)
+    clock.now += 0.5
+    assert buckets.take("a") == 0
+    assert buckets.take("b") == 0
+
+
+def test_bucket_never_refills_past_burst():
+    clock = Clock()
+    buckets = _Buckets(rate=1.0, burst=2, max_keys=10, clock=clock)
+    clock.now += 100
+    assert [buckets.take("a") for _ in range(3)][-1] > 0
+
+
+def test_zero_rate_disables_bucket():
+    buckets = _Buckets(rate=0, burst=1, max_keys=10, clock=Clock())
+    assert all(buckets.take("a") == 0 for _ in range(100))
+    assert len(buckets) == 0
+
+
+def test_least_recently_used_key_is_dropped():
+    buckets = _Buckets(rate=1.0, burst=1, max_keys=2, clock=Clock())
+    buckets.take("a")
+    buckets.take("b")
+    buckets.take("a")
+    buckets.take("c")
+    assert len(buckets) == 2
+    # "b" was dropped, so it starts with a full bucket again
+    assert buckets.take("b") == 0
+    assert buckets.take("c") > 0
+
+
+def test_rotating_senders_hit_the_ip_bucket():
+    admission = Admission(clock=Clock())
+    admitted = 0
+    for n in range(100):
+        try:
+            admission.check("10.0.0.1", f"sender{n}")
+            admitted += 1
+        except Rejected as e:
+            assert e.reason == "ip"
+    assert admitted == 60
+
+
+def test_sender_bucket_rejects_with_retry_after():
+    admission = Admission(sender_rate=1.0, sender_burst=2, clock=Clock())
+    admission.check(None, "s")
+    admission.check(None, "s")
+    with pytest.raises(Rejected) as e:
+        admission.check(None, "s")
+    assert (e.value.reason, e.value.retry_after) == ("sender", 1)
+    assert admission.rejected == {"sender": 1}
+
+
+def test_in_flight_budget():
+    admission = Admission(sender_rate=0, max_in_flight=1, clock=Clock())
+    with admission.admit(None, "a"):
+        assert admission.in_flight == 1
+        with pytest.raises(Rejected) as e:
+            admission.check(None, "b")
+        assert e.value.reason == "in_flight"
+    assert admission.in_flight == 0
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import pytest
+
+import chatbot
+from admission import Admission
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def bulk(monkeypatch):
+    """stream_bulk with a ready model, fresh admission state and a stub turn."""
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(chatbot.startup, "ready", ready)
+    monkeypatch.setattr(chatbot, "admission", Admission(ip_rate=10.0, ip_burst=60, sender_rate=1.0,
+                                                        sender_burst=10, clock=Clock()))
+
+    async def handle_turn(sender_id, message, on_message=None, persist=True):
+        return [{"recipient_id": sender_id, "text": message}]
+
+    monkeypatch.setattr(chatbot, "handle_turn", handle_turn)
+
+    def run(body, authorization=None, client_ip="10.0.0.1"):
+        async def collect():
+            return [item async for item in chatbot.stream_bulk(body, authorization, client_ip)]
+        status, *results = asyncio.run(collect())
+        return status, results
+    return run
+
+
+def test_rotating_senders_are_throttled_per_message(bulk):
+    messages = [{"sender": f"rotating_{n}", "message": "hi"} for n in range(100)]
+    (status, _), results = bulk({"messages": messages})
+    assert status == 200
+    statuses = [result["status"] for result in results]
+    assert statuses.count(200) == 60
+    assert statuses.count(429) == 40
+    assert chatbot.admission.rejected["ip"] == 40
+
+
+def test_one_sender_is_held_to_its_bucket(bulk):
+    messages = [{"sender": "one", "message": f"hi {n}"} for n in range(15)]
+    (status, _), results = bulk({"messages": messages})
+    assert status == 200
+    assert [result["status"] for result in sorted(results, key=lambda r: r["index"])] == [200] * 10 + [429] * 5
+
+
+def test_evaluation_needs_the_admin_token(bulk, monkeypatch):
+    monkeypatch.setattr(chatbot, "ADMIN_TOKEN", "secret")
+    body = {"messages": [{"sender": "s", "message": "hi"}], "evaluation": True}
+    (status, _), _ = bulk(body, authorization="Bearer wrong")
+    assert status in (401, 403)
+    (status, _), results = bulk(body, authorization="Bearer secret")
+    assert status == 200
+    assert results[0]["status"] == 200
+    assert chatbot.admission.admitted == 0
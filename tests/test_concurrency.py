@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from concurrency import Overloaded, SenderGate
+
+
+async def turn(gate, sender_id, log, name, delay=0.01):
+    async with gate.slot(sender_id):
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+
+
+def test_one_sender_runs_in_arrival_order():
+    async def main():
+        gate, log = SenderGate(max_concurrency=4), []
+        await asyncio.gather(*(turn(gate, "s", log, n) for n in range(3)))
+        return log
+
+    log = asyncio.run(main())
+    assert log == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+
+
+def test_senders_run_in_parallel_up_to_max_concurrency():
+    async def main():
+        gate, log = SenderGate(max_concurrency=2), []
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while True:
+                peak = max(peak, gate.active)
+                await asyncio.sleep(0)
+
+        watcher = asyncio.ensure_future(watch())
+        await asyncio.gather(*(turn(gate, f"s{n}", log, n) for n in range(5)))
+        watcher.cancel()
+        return gate, peak
+
+    gate, peak = asyncio.run(main())
+    assert peak == 2
+    assert gate.stats()["senders_in_flight"] == 0
+    assert gate.waiting == gate.active == 0
+
+
+def test_rejects_beyond_pending_per_sender():
+    async def main():
+        gate, log = SenderGate(max_pending_per_sender=2), []
+        results = await asyncio.gather(*(turn(gate, "s", log, n) for n in range(3)), return_exceptions=True)
+        return gate, results
+
+    gate, results = asyncio.run(main())
+    assert results[:2] == [None, None]
+    assert isinstance(results[2], Overloaded)
+    assert gate.rejected == 1
+
+
+def test_rejects_when_queue_is_full():
+    async def main():
+        gate, log = SenderGate(max_concurrency=1, max_queue=1), []
+        first = asyncio.ensure_future(turn(gate, "a", log, "a"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(turn(gate, "b", log, "b"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await turn(gate, "c", log, "c")
+        await asyncio.gather(first, second)
+        return gate
+
+    gate = asyncio.run(main())
+    assert gate.stats()["rejected"] == 1
+
+
+def test_cancelled_waiter_releases_its_place():
+    async def main():
+        gate, log = SenderGate(max_concurrency=1), []
+        first = asyncio.ensure_future(turn(gate, "a", log, "a", delay=0.05))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(turn(gate, "b", log, "b"))
+        await asyncio.sleep(0)
+        assert gate.waiting == 1
+        second.cancel()
+        await first
+        return gate
+
+    gate = asyncio.run(main())
+    assert gate.waiting == gate.active == 0
+    assert gate.stats()["senders_in_flight"] == 0
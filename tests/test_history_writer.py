@@ -0,0 +1,62 @@
+from history_writer import HistoryWriter
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_appends_lines_in_order(tmp_path):
+    writer = HistoryWriter(flush_interval=0.01)
+    path = str(tmp_path / "chat.txt")
+    writer.append(path, ["first", "second"])
+    writer.append(path, ["third"])
+    writer.flush()
+    assert read(path) == b"first\nsecond\nthird\n"
+    assert writer.lines_written == 3
+
+
+def test_torn_tail_is_cut_before_appending(tmp_path):
+    path = str(tmp_path / "chat.txt")
+    with open(path, "wb") as f:
+        f.write(b"complete line\nhalf a li")
+    writer = HistoryWriter(flush_interval=0.01)
+    writer.append(path, ["next line"])
+    writer.flush()
+    assert read(path) == b"complete line\nnext line\n"
+
+
+def test_tail_without_any_newline_is_dropped(tmp_path):
+    path = str(tmp_path / "chat.txt")
+    with open(path, "wb") as f:
+        f.write(b"x" * 10000)
+    writer = HistoryWriter(flush_interval=0.01)
+    writer.append(path, ["line"])
+    writer.flush()
+    assert read(path) == b"line\n"
+
+
+def test_failed_write_does_not_stop_the_writer(tmp_path):
+    writer = HistoryWriter(flush_interval=0.01)
+    writer.append(str(tmp_path / "missing" / "chat.txt"), ["lost"])
+    writer.flush()
+    path = str(tmp_path / "chat.txt")
+    writer.append(path, ["kept"])
+    writer.flush()
+    assert read(path) == b"kept\n"
+    assert writer._thread.is_alive()
+
+
+def test_failed_repair_does_not_stop_the_writer(tmp_path, monkeypatch):
+    writer = HistoryWriter(flush_interval=0.01)
+
+    def broken(fd):
+        raise AttributeError("no pread here")
+    monkeypatch.setattr(HistoryWriter, "_repair", staticmethod(broken))
+    writer.append(str(tmp_path / "a.txt"), ["lost"])
+    writer.flush()
+    monkeypatch.undo()
+    writer.append(str(tmp_path / "b.txt"), ["kept"])
+    writer.flush()
+    assert read(str(tmp_path / "b.txt")) == b"kept\n"
+    assert read(str(tmp_path / "a.txt")) == b""
@@ -0,0 +1,73 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+import inference_pool
+from inference_pool import InferencePool
+
+
+def test_process_mode_falls_back_to_threads_without_fork(monkeypatch):
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    pool = InferencePool(mode="process", workers=2)
+    assert pool.mode == "thread"
+    pool.start()
+    assert pool._processes == []
+
+
+
+@pytest.fixture
+def worker_state(monkeypatch):
+    """Empty worker-side model cache with a _worker_build that waits for `release`."""
+    release = threading.Event()
+    built = []
+
+    def build(model_path):
+        if model_path.startswith("broken"):
+            raise RuntimeError(f"cannot load {model_path}")
+        if model_path.startswith("slow"):
+            assert release.wait(5)
+        built.append(model_path)
+        return f"agent for {model_path}"
+
+    monkeypatch.setattr(inference_pool, "_worker_agents", {})
+    monkeypatch.setattr(inference_pool, "_worker_loaders", {})
+    monkeypatch.setattr(inference_pool, "_worker_errors", {})
+    monkeypatch.setattr(inference_pool, "_worker_build", build)
+    return release, built
+
+
+def wait_loaded(model_path):
+    for _ in range(500):
+        if inference_pool._worker_loaded(model_path):
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"{model_path} never finished loading")
+
+
+def test_worker_answers_for_old_model_while_new_one_loads(worker_state):
+    release, built = worker_state
+    assert inference_pool._worker_load("old") == "agent for old"
+    inference_pool._worker_preload("slow_new")
+    assert inference_pool._worker_loaded("slow_new") is False
+    assert inference_pool._worker_load("old") == "agent for old"
+    release.set()
+    wait_loaded("slow_new")
+    assert inference_pool._worker_load("slow_new") == "agent for slow_new"
+    assert built == ["old", "slow_new"]
+
+
+def test_request_during_background_load_waits_for_it(worker_state):
+    release, built = worker_state
+    inference_pool._worker_preload("slow_new")
+    threading.Timer(0.05, release.set).start()
+    assert inference_pool._worker_load("slow_new") == "agent for slow_new"
+    assert built == ["slow_new"]
+
+
+def test_failed_background_load_is_reported_once(worker_state):
+    inference_pool._worker_preload("broken")
+    with pytest.raises(RuntimeError, match="cannot load broken"):
+        wait_loaded("broken")
+    assert inference_pool._worker_loaded("broken") is True
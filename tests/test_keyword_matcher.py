@@ -0,0 +1,58 @@
+import pytest
+
+from actions.keyword_matcher import KeywordMatcher, tokenize
+from actions.knowledge_base import KnowledgeBase
+
+
+@pytest.fixture(scope="module")
+def kb():
+    return KnowledgeBase.load()
+
+
+def test_tokenize_drops_plural_s():
+    assert tokenize("Labs, classes & hands-on") == ["lab", "classe", "hand", "on"]
+
+
+def test_whole_tokens_only():
+    matcher = KeywordMatcher({"facility": ["lab"]})
+    assert not matcher.scan("we collaborate").any("facility")
+    assert matcher.scan("the labs").keywords("facility", "lab") == ["lab"]
+
+
+def test_capitalized_keyword_needs_capitals():
+    matcher = KeywordMatcher({"college": {"ccs": ["IT"]}})
+    assert matcher.scan("is IT hard?").first("college") == "ccs"
+    assert matcher.scan("is it hard?").first("college") is None
+    assert matcher.scan("IS IT HARD?").first("college") is None
+
+
+def test_longest_keyword_wins_over_table_order():
+    matcher = KeywordMatcher({"college": {"ccs": ["computer"], "coe": ["engineering", "computer engineering"]}})
+    matches = matcher.scan("tell me about computer engineering")
+    assert matches.first("college") == "coe"
+    # Lists keep table order
+    assert matches.labels("college") == ["ccs", "coe"]
+    assert matches.keywords("college", "coe") == ["engineering", "computer engineering"]
+
+
+def test_interest_labels_keep_table_order(kb):
+    # 'hands-on' is the longer keyword, but the reply lists interests as the
+    # knowledge base does
+    assert kb.scan("I like hands-on lab work and computer programming").labels("interest") == ["technical", "practical"]
+
+
+def test_table_order_breaks_ties():
+    matcher = KeywordMatcher({"college": {"ccs": ["computer"], "coe": ["engineering"]}})
+    assert matcher.scan("computer or engineering").first("college") == "ccs"
+
+
+@pytest.mark.parametrize("message, college", [
+    ("is it hard to study nursing?", "chs"),
+    ("where is the dean office of coe", "coe"),
+    ("Is IT a good course?", "ccs"),
+    ("can I take information systems", "ccs"),
+    ("what does ca stand for in medical school", "chs"),
+    ("is it expensive", None),
+])
+def test_active_college_from_message(kb, message, college):
+    assert kb.scan(message).first("college") == college
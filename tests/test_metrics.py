@@ -0,0 +1,26 @@
+import metrics
+
+
+def test_counter_and_histogram_render():
+    registry = metrics.Registry()
+    requests = registry.counter("requests_total", "Requests.", ["status"])
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    requests.inc("200")
+    requests.inc("200")
+    latency.observe(0.5)
+    text = registry.render()
+    assert 'requests_total{status="200"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1.0"} 1' in text
+    assert "latency_seconds_count 1" in text
+
+
+def test_totals_read_at_scrape_time_are_counters():
+    registry = metrics.Registry()
+    rejected = {"ip": 3}
+    registry.counter_from("rejected_total", "Rejected.", lambda: rejected, label="reason")
+    registry.gauge("in_flight", "In flight.", lambda: 2)
+    text = registry.render()
+    assert "# TYPE rejected_total counter" in text
+    assert 'rejected_total{reason="ip"} 3' in text
+    assert "# TYPE in_flight gauge" in text
@@ -0,0 +1,55 @@
+import pytest
+
+from parallel_test import intent_report, merge
+
+
+def story(name, failed, actions, predicted, intents=(), predicted_intents=()):
+    return {"story": name, "failed": failed, "action_targets": list(actions), "action_predictions": list(predicted),
+            "intent_targets": list(intents), "intent_predictions": list(predicted_intents)}
+
+
+def test_intent_report():
+    pairs = [("greet", "greet"), ("greet", "bye"), ("bye", "bye"), ("ask", None)]
+    report = intent_report(pairs)
+    assert set(report) == {"greet", "bye", "ask"}
+    assert report["greet"] == {"precision": 1.0, "recall": 0.5, "f1-score": pytest.approx(2 / 3), "support": 2}
+    assert report["bye"]["precision"] == 0.5
+    assert report["bye"]["recall"] == 1.0
+    assert report["ask"] == {"precision": 0.0, "recall": 0.0, "f1-score": 0.0, "support": 1}
+
+
+def test_merge_lists_failed_stories_and_their_mistakes():
+    results = [
+        story("happy", False, ["utter_greet", "action_listen"], ["utter_greet", "action_listen"]),
+        story("sad", True, ["utter_greet", "utter_bye"], ["utter_greet", "utter_default"],
+              ["greet", "bye"], ["greet", "deny"]),
+    ]
+    nlu = [("greet", "greet", 0.9, "hi"), ("bye", "greet", 0.6, "cya"), ("bye", "bye", 0.8, "bye")]
+    report = merge(results, nlu)
+
+    stories = report["stories"]
+    assert (stories["total"], stories["failed"], stories["accuracy"]) == (2, 1, 0.5)
+    assert stories["action_accuracy"] == 0.75
+    assert stories["failures"] == [{"story": "sad", "mistakes": [
+        {"step": 1, "expected": "utter_bye", "predicted": "utter_default"},
+        {"step": 1, "expected_intent": "bye", "predicted_intent": "deny"},
+    ]}]
+
+    assert report["nlu"]["examples"] == 3
+    assert report["nlu"]["accuracy"] == pytest.approx(2 / 3)
+    assert report["nlu"]["confusions"] == [{"intent": "bye", "predicted": "greet", "count": 1}]
+    assert report["nlu"]["errors"] == [{"text": "cya", "intent": "bye", "predicted": "greet", "confidence": 0.6}]
+
+
+def test_merge_does_not_depend_on_shard_order():
+    results = [story(f"s{i}", i % 2 == 1, ["a", "b"], ["a", "b" if i % 2 == 0 else "c"]) for i in range(4)]
+    nlu = [("x", "x", 1.0, "one"), ("y", "x", 0.5, "two")]
+    forward, backward = merge(results, nlu), merge(results[::-1], nlu[::-1])
+    assert forward["stories"]["accuracy"] == backward["stories"]["accuracy"] == 0.5
+    assert forward["nlu"]["intents"] == backward["nlu"]["intents"]
+
+
+def test_merge_empty():
+    report = merge([], [])
+    assert report["stories"]["accuracy"] is None
+    assert report["nlu"]["accuracy"] is None
@@ -0,0 +1,138 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from response_cache import ResponseCache, featurized_slots, normalize_text
+
+
+class FakeTrackerStore:
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    async def retrieve(self, sender_id):
+        return self.tracker
+
+
+def make_cache(**kwargs):
+    kwargs.setdefault("enabled", True)
+    kwargs.setdefault("context_free_intents", ["admission_*"])
+    return ResponseCache(**kwargs)
+
+
+def test_normalize_text():
+    assert normalize_text("  How do I APPLY?! ") == "how do i apply"
+
+
+def test_default_key_slots_are_the_featurized_domain_slots():
+    cache = make_cache()
+    assert cache.key_slots == featurized_slots()
+    assert "active_college" in cache.key_slots
+
+
+def test_explicit_key_slots_override_the_domain():
+    assert make_cache(key_slots=[]).key_slots == ()
+    cache = make_cache(key_slots=["program"])
+    cache.use_domain(SimpleNamespace(slots=[SimpleNamespace(name="active_college", influence_conversation=True)]))
+    assert cache.key_slots == ("program",)
+
+
+def test_use_domain_keeps_only_featurized_slots():
+    cache = make_cache()
+    cache.use_domain(SimpleNamespace(slots=[
+        SimpleNamespace(name="active_college", influence_conversation=True),
+        SimpleNamespace(name="session_started_metadata", influence_conversation=False),
+    ]))
+    assert cache.key_slots == ("active_college",)
+
+
+def test_key_depends_on_slot_values():
+    cache = make_cache(key_slots=["active_college"])
+    tracker = SimpleNamespace(get_slot=lambda name: "ccs")
+    agent = SimpleNamespace(tracker_store=FakeTrackerStore(tracker))
+    key_ccs = asyncio.run(cache.key_for(agent, "s", "Where is the dean?"))
+    tracker.get_slot = lambda name: "coe"
+    key_coe = asyncio.run(cache.key_for(agent, "s", "where is the dean"))
+    assert key_ccs != key_coe
+    assert key_ccs[1] == key_coe[1] == "where is the dean"
+
+
+def test_put_get_and_clear():
+    cache = make_cache(key_slots=[])
+    key = (cache.generation, "hi", ())
+    cache.put(key, [{"text": "hello"}], [])
+    assert cache.get(key).responses == [{"text": "hello"}]
+    cache.clear()
+    assert cache.get(key) is None
+    # A turn that started before the clear cannot store into the new generation
+    cache.put(key, [{"text": "stale"}], [])
+    assert cache.get((cache.generation, "hi", ())) is None
+
+
+def test_lru_eviction():
+    cache = make_cache(key_slots=[], max_entries=2)
+    for text in ("a", "b", "c"):
+        cache.put((0, text, ()), [], [])
+    assert cache.get((0, "a", ())) is None
+    assert cache.evictions == 1
+
+
+def processor_turn(text, intent, confidence, action, reply, college):
+    """Tracker of one turn as Rasa 3.6's MessageProcessor logs it."""
+    events = pytest.importorskip("rasa.shared.core.events")
+    from rasa.shared.core.domain import Domain
+    from rasa.shared.core.trackers import DialogueStateTracker
+
+    domain = Domain.from_yaml(f"""
+version: "3.1"
+intents: [{intent}]
+slots:
+  active_college:
+    type: text
+    influence_conversation: true
+    mappings:
+      - type: custom
+responses:
+  {action}:
+    - text: "{reply}"
+""")
+    tracker = DialogueStateTracker.from_events("s", [
+        events.ActionExecuted("action_listen"),
+        events.SlotSet("active_college", college),
+        events.ActionExecuted("action_listen"),
+        events.UserUttered(text, intent={"name": intent, "confidence": confidence}),
+        events.DefinePrevUserUtteredFeaturization(False),
+        events.ActionExecuted(action, policy="TEDPolicy", confidence=0.99),
+        events.BotUttered(reply, {"elements": None, "buttons": None}),
+        events.ActionExecuted("action_listen"),
+    ], slots=domain.slots)
+    return domain, tracker
+
+
+def test_processor_turn_is_stored_and_served_to_the_next_identical_message():
+    domain, tracker = processor_turn("How do I apply?", "admission_process", 0.98,
+                                     "utter_admission_process", "Apply online.", "ccs")
+    cache = make_cache()
+    cache.use_domain(domain)
+    agent = SimpleNamespace(tracker_store=FakeTrackerStore(tracker))
+
+    async def turn(message):
+        key = await cache.key_for(agent, "s", message)
+        cached = cache.get(key)
+        if cached is None:
+            await cache.store_turn(agent, "s", key, [{"recipient_id": "s", "text": "Apply online."}])
+        return cached
+
+    assert asyncio.run(turn("How do I apply?")) is None
+    assert cache.stores == 1
+    cached = asyncio.run(turn("how do i apply"))
+    assert cached is not None and cached.responses == [{"text": "Apply online."}]
+    assert [event["event"] for event in cached.events][:2] == ["user", "user_featurization"]
+
+
+def test_turn_with_custom_action_is_not_cached():
+    events = pytest.importorskip("rasa.shared.core.events")
+    _, tracker = processor_turn("How do I apply?", "admission_process", 0.98,
+                                "utter_admission_process", "Apply online.", "ccs")
+    tracker.update(events.ActionExecuted("action_set_active_college"))
+    assert make_cache().cacheable_events(tracker) is None
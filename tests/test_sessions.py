@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+
+import pytest
+
+from chat_allocator import ChatFileAllocator
+from sessions import InMemorySessionStore, SessionBackend, SQLiteSessionStore, create_session_store
+
+MESSAGE_LIMIT = 10
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        SessionBackend()
+
+
+def test_memory_store_counts_and_evicts(tmp_path):
+    store = InMemorySessionStore(ChatFileAllocator(str(tmp_path)), max_sessions=2)
+    first, is_new = store.touch("a")
+    assert is_new and first.message_count == 1
+    again, is_new = store.touch("a")
+    assert not is_new and again.message_count == 2 and again.filename == first.filename
+    store.touch("b")
+    store.touch("c")
+    assert len(store) == 2
+    evicted, is_new = store.touch("a")
+    assert is_new and evicted.message_count == 1 and evicted.filename != first.filename
+
+
+def test_sqlite_store_counts_per_sender(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ChatFileAllocator(str(tmp_path)))
+    for n in range(1, 4):
+        session, is_new = store.touch("a")
+        assert session.message_count == n
+        assert is_new == (n == 1)
+    other, _ = store.touch("b")
+    assert other.message_count == 1 and other.filename != session.filename
+    assert len(store) == 2
+
+
+def _worker(db_path, chat_dir, senders, messages, results):
+    store = create_session_store("sqlite", ChatFileAllocator(chat_dir), db_path=db_path)
+    counts, filenames = [], {}
+    for _ in range(messages):
+        for sender_id in senders:
+            session, _ = store.touch(sender_id)
+            counts.append((sender_id, session.message_count))
+            filenames.setdefault(sender_id, set()).add(session.filename)
+    results.put((counts, filenames))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_sqlite_limit_and_chat_files_hold_across_processes(tmp_path):
+    """Every count is handed out exactly once per sender, and each sender gets its own file."""
+    db_path = str(tmp_path / "sessions.db")
+    chat_dir = str(tmp_path)
+    create_session_store("sqlite", ChatFileAllocator(chat_dir), db_path=db_path)
+    senders = [f"sender_{i}" for i in range(10)]
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_worker, args=(db_path, chat_dir, senders, 5, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    counts = {}
+    filenames = {}
+    for worker_counts, worker_filenames in outcomes:
+        for sender_id, count in worker_counts:
+            counts.setdefault(sender_id, []).append(count)
+        for sender_id, names in worker_filenames.items():
+            filenames.setdefault(sender_id, set()).update(names)
+
+    for sender_id in senders:
+        # 4 workers x 5 messages: counts 1..20 with no duplicates or gaps
+        assert sorted(counts[sender_id]) == list(range(1, 21))
+        assert sum(count <= MESSAGE_LIMIT for count in counts[sender_id]) == MESSAGE_LIMIT
+        assert len(filenames[sender_id]) == 1
+    assert len(set().union(*filenames.values())) == len(senders)
+    assert len([name for name in os.listdir(chat_dir) if name.startswith("chat_history_")]) == len(senders)
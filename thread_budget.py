@@ -0,0 +1,108 @@
+# thread_budget.py
+#
+# Splits the host's cores between the processes that run inference, so N
+# workers do not each start TensorFlow's and BLAS's default
+# one-thread-per-core pools. apply() must run before numpy or TensorFlow is
+# imported: OpenMP and BLAS read their thread counts once, when they load.
+#
+#   THREAD_BUDGET_CORES    cores to use on this host (default: all this
+#                          process may run on)
+#   THREAD_BUDGET_WORKERS  processes sharing them (default: PREFORK_WORKERS,
+#                          or INFERENCE_WORKERS with INFERENCE_EXECUTOR=process,
+#                          else 1)
+#   THREADS_PER_WORKER     threads for each process; default cores // workers.
+#                          0 leaves every library at its own default
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Read by OpenMP, OpenBLAS, MKL, BLIS, Apple Accelerate and numexpr. spaCy's
+# en_core_web_sm runs its thinc layers through numpy, so these cover it too
+BLAS_THREAD_VARIABLES = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+)
+
+_applied = None
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers():
+    if os.environ.get("PREFORK_WORKERS"):
+        return int(os.environ["PREFORK_WORKERS"])
+    if os.environ.get("INFERENCE_EXECUTOR") == "process":
+        return int(os.environ.get("INFERENCE_WORKERS", "4"))
+    return 1
+
+
+def budget(cores=None, workers=None, threads=None):
+    """Thread counts for one of `workers` processes sharing `cores` cores.
+
+    Returns None when `threads` is 0, i.e. library defaults are kept.
+    """
+    cores = cores or int(os.environ.get("THREAD_BUDGET_CORES", "0")) or available_cores()
+    workers = workers or int(os.environ.get("THREAD_BUDGET_WORKERS", "0")) or default_workers()
+    if threads is None:
+        threads = os.environ.get("THREADS_PER_WORKER")
+        threads = int(threads) if threads else max(1, cores // max(1, workers))
+    if threads == 0:
+        return None
+    return {
+        "cores": cores,
+        "workers": workers,
+        "intra_op": threads,
+        # DIET/TED graphs are mostly one chain of ops; a second inter-op
+        # thread only helps once there are cores to spare
+        "inter_op": 2 if threads >= 4 else 1,
+        "blas": threads,
+    }
+
+
+def apply(cores=None, workers=None, threads=None):
+    """Set the thread counts of this process. Call before importing numpy or TensorFlow."""
+    global _applied
+    settings = budget(cores, workers, threads)
+    if settings is None:
+        _applied = {}
+        return _applied
+    for name in BLAS_THREAD_VARIABLES:
+        os.environ[name] = str(settings["blas"])
+    # TensorFlow reads these when its runtime starts; configure_tensorflow()
+    # sets the same through the API once it is imported
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(settings["intra_op"])
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(settings["inter_op"])
+    _applied = settings
+    logger.info(f"Thread budget: {settings['intra_op']} intra-op, {settings['inter_op']} inter-op, "
+                f"{settings['blas']} BLAS threads per worker ({settings['workers']} workers "
+                f"on {settings['cores']} cores)")
+    return settings
+
+
+def ensure_applied():
+    """apply() with the settings from the environment, unless it already ran."""
+    return _applied if _applied is not None else apply()
+
+
+def configure_tensorflow(tf):
+    """Apply the budget to an imported, not yet initialized TensorFlow."""
+    if not _applied:
+        return
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(_applied["intra_op"])
+        tf.config.threading.set_inter_op_parallelism_threads(_applied["inter_op"])
+    except RuntimeError as e:
+        # The runtime already started, e.g. TF was used before import_rasa()
+        logger.warning(f"TensorFlow thread counts left unchanged: {e}")
+
+
+def current():
+    """What apply() set, for /stats; {} if library defaults are in use."""
+    return dict(_applied or {})